@@ -0,0 +1,260 @@
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support import parallel
+from support.animations import animation_free
+from support.async_driver import AsyncTestRunner
+from support.browser_pool import BrowserPool
+from support.display import VirtualDisplay, can_start_virtual_display, has_display
+from support.geckodriver import GeckodriverManager
+from support.local_app import LIVE_URL, LocalCoffeeCart
+from support.menu_snapshot import read_catalogue
+from support.network_policy import OFF, POLICIES, NetworkPolicy, NetworkReport, PolicyProxy
+from support.pages import open_page
+from support.preconditions import PreconditionScheduler, PreparedStates, can_reuse_state, is_last_reuse, precondition_of
+from support.prices import PriceCatalogue
+from support.tab_executor import TabExecutor
+from support.timing import TimingReport
+from support.transport import CLASSIC, TRANSPORTS
+from support.waits import DomWait, WaitSummary
+
+
+def pytest_addoption(parser: pytest.Parser):
+    parser.addoption(
+        "--coffee-cart-target",
+        choices=["live", "local"],
+        default=os.environ.get("COFFEE_CART_TARGET", "live"),
+        help="run against the live coffee-cart.app or the bundled local copy",
+    )
+    parser.addoption(
+        "--transport",
+        choices=TRANSPORTS,
+        default=os.environ.get("COFFEE_CART_TRANSPORT", CLASSIC),
+        help="send value-only scripts over classic WebDriver HTTP or a WebDriver BiDi websocket",
+    )
+    parser.addoption(
+        "--animations",
+        choices=["on", "off"],
+        default=os.environ.get("COFFEE_CART_ANIMATIONS", "on"),
+        help="with off, CSS transitions and animations are disabled for every test not marked as animated",
+    )
+    parser.addoption(
+        "--network-policy",
+        choices=list(POLICIES),
+        default=os.environ.get("COFFEE_CART_NETWORK_POLICY", OFF),
+        help="route the browsers through a proxy which caches static assets (cache) and blocks fonts, images and "
+             "analytics (lean)",
+    )
+    parser.addoption(
+        "--model-steps",
+        type=int,
+        default=200,
+        help="number of random cart and promo actions compared with the reference model",
+    )
+    parser.addoption(
+        "--model-seed",
+        default="1",
+        help="seed of the random actions, or random for a new sequence on every run; a failing exploration reports the "
+             "seed it used",
+    )
+    parser.addoption(
+        "--timing-report",
+        default=None,
+        help="path of the JSON timing report, by default it is kept in the pytest cache",
+    )
+    parser.addoption(
+        "--timing-top",
+        type=int,
+        default=10,
+        help="number of the slowest tests, commands and helpers shown in the terminal",
+    )
+
+
+def pytest_configure(config: pytest.Config):
+    config.addinivalue_line("markers", "headful: the test needs real rendering and runs in a headful browser")
+    config.addinivalue_line("markers", "read_only: the test only reads the page and shares one browser with the other read-only tests")
+    config.addinivalue_line("markers", "precondition(name): the test starts from the named application state, built with prepare()")
+    config.addinivalue_line("markers", "animated: the test checks transitions or animations, they stay on with --animations=off")
+    config.addinivalue_line("markers", "expensive_setup: the test builds a cart by clicking, scheduled first in parallel runs")
+
+    config.pluginmanager.register(parallel.DurationRecorder(config), "coffeecart-durations")
+    config.pluginmanager.register(WaitSummary(), "coffeecart-wait-summary")
+    config.pluginmanager.register(TimingReport(config), "coffeecart-timing-report")
+    config.pluginmanager.register(AsyncTestRunner(), "coffeecart-async-tests")
+    config.pluginmanager.register(PreconditionScheduler(config), "coffeecart-preconditions")
+    config.pluginmanager.register(NetworkReport(config), "coffeecart-network-report")
+
+    if parallel.is_worker(config):
+        config.pluginmanager.register(parallel.WorkerTiming(config), "coffeecart-worker-timing")
+    elif config.pluginmanager.hasplugin("xdist"):
+        config.pluginmanager.register(parallel.ParallelSummary(), "coffeecart-parallel-summary")
+
+
+# Runs before xdist's own hook, which turns the xdist_group markers into the @group suffix of the node ids
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(items: list[pytest.Item]):
+    # With --dist loadgroup the headful lane stays on one worker, next to the headless ones
+    for item in items:
+        if item.get_closest_marker("headful"):
+            item.add_marker(pytest.mark.xdist_group("headful"))
+
+
+@pytest.fixture(scope="session")
+def base_url(request: pytest.FixtureRequest):
+    if request.config.getoption("coffee_cart_target") == "live":
+        yield LIVE_URL
+        return
+
+    local_app = LocalCoffeeCart()
+    local_app.start()
+
+    yield local_app.url
+
+    local_app.stop()
+
+
+@pytest.fixture(scope="session")
+def geckodriver():
+    # One manager per worker process, its geckodriver services are shared by every pool and test module
+    manager = GeckodriverManager()
+
+    yield manager
+
+    manager.close()
+
+
+@pytest.fixture(scope="session")
+def network_preferences(request: pytest.FixtureRequest):
+    policy: NetworkPolicy | None = POLICIES[request.config.getoption("network_policy")]
+
+    if policy is None:
+        yield {}
+        return
+
+    cache: pytest.Cache | None = getattr(request.config, "cache", None)
+
+    # The cache directory is shared by the workers and kept between runs, without the cache plugin it lasts one session
+    with ExitStack() as stack:
+        if cache is not None:
+            directory = cache.mkdir("coffeecart-network")
+        else:
+            directory = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="coffeecart-network-")))
+
+        proxy = PolicyProxy(policy, directory)
+        proxy.start()
+
+        yield proxy.preferences()
+
+        proxy.stop()
+
+
+@pytest.fixture(scope="session")
+def browser_pool(request: pytest.FixtureRequest, geckodriver: GeckodriverManager, network_preferences: dict):
+    pool = BrowserPool(
+        geckodriver, headless=True, transport=request.config.getoption("transport"), preferences=network_preferences,
+    )
+
+    yield pool
+
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def headful_browser_pool(request: pytest.FixtureRequest, geckodriver: GeckodriverManager, network_preferences: dict):
+    display: VirtualDisplay | None = None
+    env: dict[str, str] | None = None
+
+    if not has_display():
+        if not can_start_virtual_display():
+            pytest.skip("needs real rendering, but there is no display and Xvfb is not installed")
+
+        display = VirtualDisplay()
+        env = {**os.environ, "DISPLAY": display.start()}
+
+    pool = BrowserPool(
+        geckodriver, headless=False, env=env, transport=request.config.getoption("transport"),
+        preferences=network_preferences,
+    )
+
+    yield pool
+
+    pool.close()
+
+    if display is not None:
+        display.stop()
+
+
+@pytest.fixture(scope="session")
+def price_catalogue(browser_pool: BrowserPool, base_url: str) -> PriceCatalogue:
+    # The menu is read once per session, the tests compute their expected totals from it
+    with browser_pool.lease() as driver:
+        open_page(driver, base_url)
+
+        return read_catalogue(driver)
+
+
+@pytest.fixture(scope="session")
+def tab_executor(browser_pool):
+    executor = TabExecutor(browser_pool)
+
+    yield executor
+
+    executor.close()
+
+
+@pytest.fixture(scope="session")
+def prepared_states(browser_pool):
+    states = PreparedStates(browser_pool)
+
+    yield states
+
+    states.close()
+
+
+@contextmanager
+def lease_driver(request: pytest.FixtureRequest) -> Iterator[WebDriver]:
+    # Read-only tests with a precondition share a browser holding the prepared state
+    if can_reuse_state(request.node):
+        prepared_states: PreparedStates = request.getfixturevalue("prepared_states")
+
+        with prepared_states.lease(precondition_of(request.node), request.node.nodeid, is_last_reuse(request.node)) as driver:
+            yield driver
+
+        return
+
+    # Tests known to change their prepared state get a fresh browser, the shared one is not reset after a test
+    if request.node.get_closest_marker("read_only") and precondition_of(request.node) is None:
+        tab_executor: TabExecutor = request.getfixturevalue("tab_executor")
+
+        with tab_executor.lease() as driver:
+            yield driver
+
+        return
+
+    # Only the tests marked as headful pay for a headful browser, the pools are created on first use
+    pool_name: str = "headful_browser_pool" if request.node.get_closest_marker("headful") else "browser_pool"
+    pool: BrowserPool = request.getfixturevalue(pool_name)
+
+    with pool.lease() as driver:
+        yield driver
+
+
+@pytest.fixture
+def driver(request: pytest.FixtureRequest):
+    with lease_driver(request) as driver:
+        if request.config.getoption("animations") == "off" and not request.node.get_closest_marker("animated"):
+            with animation_free(driver):
+                yield driver
+        else:
+            yield driver
+
+
+@pytest.fixture
+def dom_wait(driver):
+    return DomWait(driver, 5)
@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from typing import Iterator
+from weakref import WeakSet
+
+from selenium.common import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.transport import run_script
+
+STYLE_ID = "coffeecart-no-animations"
+
+# Transitions and animations end at once, so the DOM settles in the same task which changed it
+NO_ANIMATIONS_CSS = """
+*, *::before, *::after {
+    transition: none !important;
+    animation: none !important;
+    scroll-behavior: auto !important;
+}
+"""
+
+# Adds or removes the override in the current document, it is applied again after every page load
+APPLY_SCRIPT = """
+const styleId = arguments[0];
+const css = arguments[1];
+const existing = document.getElementById(styleId);
+
+if (css === null) {
+    if (existing !== null) {
+        existing.remove();
+    }
+
+    return;
+}
+
+if (existing === null) {
+    const style = document.createElement("style");
+    style.id = styleId;
+    style.textContent = css;
+    (document.head || document.documentElement).appendChild(style);
+}
+"""
+
+_animation_free: WeakSet[WebDriver] = WeakSet()
+
+
+def apply_animation_mode(driver: WebDriver):
+    css: str | None = NO_ANIMATIONS_CSS if driver in _animation_free else None
+    run_script(driver, APPLY_SCRIPT, STYLE_ID, css)
+
+
+@contextmanager
+def animation_free(driver: WebDriver) -> Iterator[WebDriver]:
+    _animation_free.add(driver)
+    apply_animation_mode(driver)
+
+    try:
+        yield driver
+    finally:
+        # Pooled and shared browsers go back to the normal mode for the next test
+        _animation_free.discard(driver)
+
+        try:
+            apply_animation_mode(driver)
+        except WebDriverException:
+            # A broken browser is replaced by its pool anyway
+            pass
@@ -0,0 +1,96 @@
+import asyncio
+import inspect
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Callable, TypeVar
+
+import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from support.browser_pool import BrowserPool
+from support.menu_snapshot import MenuEntry
+from support.pages import CartPreview, MenuPage, open_page
+from support.prices import parse_price
+from support.waits import DomWait, WaitRecord
+
+T = TypeVar("T")
+
+
+class AsyncDriver:
+    def __init__(self, driver: WebDriver, semaphore: asyncio.Semaphore):
+        self.driver = driver
+        self.semaphore = semaphore
+
+        # Commands of one session are sent one at a time, other browsers keep going meanwhile
+        self._lock = asyncio.Lock()
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        async with self._lock, self.semaphore:
+            return await asyncio.to_thread(function, *args)
+
+    async def get(self, url: str):
+        await self.run(open_page, self.driver, url)
+
+    async def text(self, element: WebElement) -> str:
+        return await self.run(lambda: element.text)
+
+    async def wait_until(self, condition: str, target: WebElement | str, timeout: float = 5) -> WaitRecord:
+        return await self.run(DomWait(self.driver, timeout).until, condition, target)
+
+
+@asynccontextmanager
+async def lease_async_drivers(pool: BrowserPool, count: int, max_concurrency: int) -> AsyncIterator[list[AsyncDriver]]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with AsyncExitStack() as stack:
+        # Browsers are launched concurrently, a cold start is the slowest part of a lease
+        results: list[WebDriver | BaseException] = await asyncio.gather(
+            *(asyncio.to_thread(pool.acquire) for _ in range(count)), return_exceptions=True,
+        )
+        drivers: list[WebDriver] = [result for result in results if not isinstance(result, BaseException)]
+
+        for driver in drivers:
+            stack.push_async_callback(asyncio.to_thread, pool.release, driver)
+
+        # A failed launch releases the browsers which did start, through the exit stack
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        yield [AsyncDriver(driver, semaphore) for driver in drivers]
+
+
+async def get_menu_entries(driver: AsyncDriver) -> list[MenuEntry]:
+    return await driver.run(lambda: MenuPage.of(driver.driver).entries)
+
+
+async def get_menu_entries_names(driver: AsyncDriver) -> list[str]:
+    return await driver.run(MenuPage.of(driver.driver).names)
+
+
+async def order_coffee(driver: AsyncDriver, cup: WebElement):
+    await driver.run(MenuPage.of(driver.driver).order, cup)
+
+
+async def get_cart_preview_entries(driver: AsyncDriver) -> list[WebElement]:
+    return await driver.run(lambda: CartPreview.of(driver.driver).entries)
+
+
+async def get_entry_price(driver: AsyncDriver, entry: WebElement) -> int:
+    # The price of a menu entry is shown next to its name in the header
+    price_small: WebElement = await driver.run(entry.find_element, By.CSS_SELECTOR, "h4 small")
+
+    return parse_price(await driver.text(price_small))
+
+
+class AsyncTestRunner:
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_pyfunc_call(self, pyfuncitem: pytest.Function):
+        if not inspect.iscoroutinefunction(pyfuncitem.obj):
+            return None
+
+        arguments: dict = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**arguments))
+
+        return True
@@ -0,0 +1,183 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from selenium.common import WebDriverException
+from selenium.webdriver import Remote
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.geckodriver import GeckodriverManager
+from support.page_cache import release_warm_tabs
+from support.pages import invalidate_pages
+from support.timing import instrument, timing_log
+from support.transport import BIDI, CLASSIC, run_script, use_bidi
+
+BLANK_URL = "about:blank"
+
+CLEAR_STORAGE_SCRIPT = "window.localStorage.clear(); window.sessionStorage.clear();"
+
+
+def reset_browser(driver: WebDriver):
+    warm_tabs: set[str] = release_warm_tabs(driver)
+    handles: list[str] = driver.window_handles
+
+    # Tests may open additional tabs, only the first one and the warm page tabs survive the reset
+    for handle in handles[1:]:
+        if handle in warm_tabs:
+            continue
+
+        driver.switch_to.window(handle)
+        driver.close()
+
+    driver.switch_to.window(handles[0])
+
+    # Cookies and storage are bound to the origin, so they have to be cleared before leaving the page
+    if driver.current_url.startswith("http"):
+        run_script(driver, CLEAR_STORAGE_SCRIPT)
+        driver.delete_all_cookies()
+
+    driver.implicitly_wait(0)
+    driver.get(BLANK_URL)
+
+    # Park the pointer in the corner, so that the next test does not start with a hover
+    action_builder = ActionBuilder(driver)
+    action_builder.pointer_action.move_to_location(0, 0)
+    action_builder.perform()
+
+    ActionChains(driver).reset_actions()
+
+    invalidate_pages(driver)
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        services: GeckodriverManager,
+        headless: bool = True,
+        max_idle: int = 2,
+        env: dict[str, str] | None = None,
+        transport: str = CLASSIC,
+        preferences: dict | None = None,
+    ):
+        self.services = services
+        self.headless = headless
+        self.env = env
+        self.transport = transport
+        self.preferences = preferences or {}
+        self.max_idle = max_idle
+
+        self._idle: list[WebDriver] = []
+        self._leased: set[WebDriver] = set()
+        self._services: dict[WebDriver, Service] = {}
+        self._lock = threading.Lock()
+
+        self.launches = 0
+        self.restarts = 0
+
+    def _launch(self) -> WebDriver:
+        options = Options()
+
+        if self.headless:
+            options.add_argument("--headless")
+
+        if self.transport == BIDI:
+            options.enable_bidi = True
+
+        for name, value in self.preferences.items():
+            options.set_preference(name, value)
+
+        service: Service = self.services.acquire(self.env)
+
+        start = time.perf_counter()
+
+        try:
+            # The geckodriver process is owned by the manager, quitting the session leaves it running for the next one
+            driver = Remote(command_executor=service.service_url, options=options)
+        except WebDriverException:
+            self.services.release(service, self.env)
+            raise
+
+        self.launches += 1
+
+        with self._lock:
+            self._services[driver] = service
+
+        # The session is created before the executor can be wrapped, so the startup is booked by hand
+        timing_log.record_command("launchBrowser", None, time.perf_counter() - start)
+        instrument(driver)
+
+        if self.transport == BIDI:
+            use_bidi(driver)
+
+        return driver
+
+    def acquire(self) -> WebDriver:
+        with self._lock:
+            driver = self._idle.pop() if self._idle else None
+
+        if driver is None:
+            driver = self._launch()
+
+        with self._lock:
+            self._leased.add(driver)
+
+        return driver
+
+    def release(self, driver: WebDriver):
+        with self._lock:
+            self._leased.discard(driver)
+
+        try:
+            reset_browser(driver)
+        except WebDriverException:
+            # The browser is in an unknown state. Its replacement is launched by the next acquire, a launch failing
+            # here would hide the error of the test which is being released.
+            self._quit(driver)
+            self.restarts += 1
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(driver)
+                return
+
+        self._quit(driver)
+
+    @contextmanager
+    def lease(self) -> Iterator[WebDriver]:
+        driver: WebDriver = self.acquire()
+
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        with self._lock:
+            drivers: list[WebDriver] = self._idle + list(self._leased)
+            self._idle.clear()
+            self._leased.clear()
+
+        for driver in drivers:
+            self._quit(driver)
+
+    def _quit(self, driver: WebDriver):
+        quit_quietly(driver)
+
+        with self._lock:
+            service: Service | None = self._services.pop(driver, None)
+
+        if service is not None:
+            self.services.release(service, self.env)
+
+
+def quit_quietly(driver: WebDriver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
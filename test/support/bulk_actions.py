@@ -0,0 +1,123 @@
+from selenium.common import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from support.pages import CartPreview, MenuPage, PromoDialog, invalidate_pages
+from support.prices import parse_total
+
+PAY_BUTTON_SELECTOR = "button.pay"
+
+# Clicks the element the given number of times and records the pay button text after each click.
+# The next click is dispatched from a new task, after the application has rendered the previous one.
+CLICK_AND_RECORD_SCRIPT = """
+const element = arguments[0];
+const clicks = arguments[1];
+const recordedSelector = arguments[2];
+const done = arguments[arguments.length - 1];
+
+const timers = window.__virtualClock ? window.__virtualClock.real : window;
+const nextTask = () => new Promise((resolve) => timers.setTimeout(resolve, 0));
+
+(async () => {
+    const recorded = [];
+
+    for (let click = 0; click < clicks; click++) {
+        element.click();
+        await nextTask();
+        recorded.push(document.querySelector(recordedSelector).innerText.trim());
+    }
+
+    done(recorded);
+})();
+"""
+
+# Empties the cart through the minus buttons of the cart preview, which is rendered (hidden) as long as the cart
+# is not empty, so the page does not have to be loaded again
+CLEAR_CART_SCRIPT = """
+const maxClicks = arguments[0];
+const done = arguments[arguments.length - 1];
+
+const timers = window.__virtualClock ? window.__virtualClock.real : window;
+const nextTask = () => new Promise((resolve) => timers.setTimeout(resolve, 0));
+
+(async () => {
+    for (let click = 0; click < maxClicks; click++) {
+        const entry = document.querySelector("ul.cart-preview li");
+
+        if (entry === null) {
+            done(true);
+            return;
+        }
+
+        entry.querySelectorAll("div.unit-controller button")[1].click();
+        await nextTask();
+    }
+
+    done(document.querySelector("ul.cart-preview li") === null);
+})();
+"""
+
+# Double-clicks every element the given number of times, each one scrolled into the view first like a real pointer,
+# and returns the text of the elements after the application has rendered the last double-click
+DOUBLE_CLICK_ALL_SCRIPT = """
+const elements = arguments[0];
+const times = arguments[1];
+const done = arguments[arguments.length - 1];
+
+const timers = window.__virtualClock ? window.__virtualClock.real : window;
+const nextTask = () => new Promise((resolve) => timers.setTimeout(resolve, 0));
+
+function dispatch(element, type, detail) {
+    const rectangle = element.getBoundingClientRect();
+
+    element.dispatchEvent(new MouseEvent(type, {
+        bubbles: true,
+        cancelable: true,
+        view: window,
+        detail: detail,
+        clientX: rectangle.left + rectangle.width / 2,
+        clientY: rectangle.top + rectangle.height / 2,
+    }));
+}
+
+(async () => {
+    for (const element of elements) {
+        element.scrollIntoView({behavior: "auto", block: "center"});
+
+        for (let time = 0; time < times; time++) {
+            for (const detail of [1, 2]) {
+                dispatch(element, "mousedown", detail);
+                dispatch(element, "mouseup", detail);
+                dispatch(element, "click", detail);
+            }
+
+            dispatch(element, "dblclick", 2);
+            await nextTask();
+        }
+    }
+
+    done(elements.map((element) => element.innerText.trim()));
+})();
+"""
+
+
+def click_and_record_totals(driver: WebDriver, element: WebElement, clicks: int) -> list[int]:
+    totals: list[str] = driver.execute_async_script(CLICK_AND_RECORD_SCRIPT, element, clicks, PAY_BUTTON_SELECTOR)
+    invalidate_pages(driver, CartPreview, PromoDialog)
+
+    return [parse_total(total) for total in totals]
+
+
+def double_click_all(driver: WebDriver, elements: list[WebElement], times: int = 1) -> list[str]:
+    texts: list[str] = driver.execute_async_script(DOUBLE_CLICK_ALL_SCRIPT, elements, times)
+    invalidate_pages(driver, MenuPage)
+
+    return texts
+
+
+def clear_cart(driver: WebDriver, max_clicks: int = 200):
+    cleared: bool = driver.execute_async_script(CLEAR_CART_SCRIPT, max_clicks)
+    invalidate_pages(driver, CartPreview, PromoDialog)
+
+    if not cleared:
+        raise TimeoutException(f"The cart was not empty after {max_clicks} clicks")
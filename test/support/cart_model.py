@@ -0,0 +1,201 @@
+import random
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.cart_seeding import PROMO_ITEM_NAME
+from support.pages import CartPreview, MenuPage, PromoDialog, invalidate_pages
+from support.prices import PriceCatalogue, parse_total
+
+ITEMS_TO_PROMO = 3
+
+# In cents
+PROMO_ITEM_PRICE = 400
+
+ORDER = "order"
+ADD = "add"
+REMOVE = "remove"
+ACCEPT = "accept"
+DISCARD = "discard"
+
+# Runs the actions one by one through the page's own buttons and observes the cart after each of them.
+# The cart preview is rendered (hidden) as long as the cart is not empty, so its buttons can be clicked directly.
+RUN_ACTIONS_SCRIPT = """
+const actions = arguments[0];
+const done = arguments[arguments.length - 1];
+
+const timers = window.__virtualClock ? window.__virtualClock.real : window;
+const nextTask = () => new Promise((resolve) => timers.setTimeout(resolve, 0));
+
+function previewRow(name) {
+    return Array.from(document.querySelectorAll("ul.cart-preview li"))
+        .find((row) => row.querySelector("span").textContent.trim() === name);
+}
+
+function target(action) {
+    switch (action.kind) {
+        case "order":
+            return document.querySelector(`div.cup[data-test="${action.name.replace(/ /g, "_")}"]`);
+        case "add":
+            return previewRow(action.name).querySelectorAll("div.unit-controller button")[0];
+        case "remove":
+            return previewRow(action.name).querySelectorAll("div.unit-controller button")[1];
+        case "accept":
+            return document.querySelector("div.promo div.buttons button.yes");
+        case "discard":
+            return document.querySelectorAll("div.promo div.buttons button")[1];
+    }
+}
+
+function observe() {
+    return {
+        items: Array.from(document.querySelectorAll("ul.cart-preview li")).map((row) => [
+            row.querySelector("span").textContent.trim(),
+            parseInt(row.querySelector("span.unit-desc").textContent.replace(/[^0-9]/g, ""), 10),
+        ]),
+        payText: document.querySelector("button.pay").textContent.trim(),
+        promoVisible: document.querySelector("div.promo") !== null,
+    };
+}
+
+(async () => {
+    const observations = [];
+
+    for (const action of actions) {
+        const element = target(action);
+
+        if (!element) {
+            observations.push({error: `nothing to click for ${action.kind} ${action.name || ""}`.trim()});
+            break;
+        }
+
+        element.click();
+        await nextTask();
+        observations.push(observe());
+    }
+
+    done(observations);
+})();
+"""
+
+
+class Action(NamedTuple):
+    kind: str
+    name: str | None = None
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.name}" if self.name else self.kind
+
+
+@dataclass(frozen=True)
+class Observation:
+    # (name, amount) in the order of the cart preview
+    items: tuple[tuple[str, int], ...]
+    # In cents
+    total: int
+    promo_visible: bool
+
+
+# Cart and promo rules of the application, as they behave today (see the skipped promo tests)
+@dataclass
+class CartModel:
+    catalogue: PriceCatalogue
+    items: dict[str, int] = field(default_factory=dict)
+    promo_visible: bool = False
+
+    def price(self, name: str) -> int:
+        return PROMO_ITEM_PRICE if name == PROMO_ITEM_NAME else self.catalogue[name]
+
+    def apply(self, action: Action):
+        if action.kind == ORDER:
+            # Only coffees ordered from the menu show the promo, the discounted items count towards it as well
+            self.items[action.name] = self.items.get(action.name, 0) + 1
+            self.promo_visible = sum(self.items.values()) % ITEMS_TO_PROMO == 0
+            return
+
+        if action.kind == ADD:
+            self.items[action.name] += 1
+        elif action.kind == REMOVE:
+            self.items[action.name] -= 1
+
+            if self.items[action.name] == 0:
+                del self.items[action.name]
+        elif action.kind == ACCEPT:
+            self.items[PROMO_ITEM_NAME] = self.items.get(PROMO_ITEM_NAME, 0) + 1
+
+        # Every other change of the cart hides the promo
+        self.promo_visible = False
+
+    def observe(self) -> Observation:
+        return Observation(
+            items=tuple(sorted(self.items.items())),
+            total=sum(self.price(name) * amount for name, amount in self.items.items()),
+            promo_visible=self.promo_visible,
+        )
+
+    # Every action the page offers in this state, with its weight
+    def possible_actions(self) -> list[tuple[Action, int]]:
+        actions: list[tuple[Action, int]] = [(Action(ORDER, name), 4) for name in self.catalogue.prices]
+        actions += [(Action(kind, name), 2) for name in self.items for kind in [ADD, REMOVE]]
+
+        if self.promo_visible:
+            actions += [(Action(ACCEPT), 12), (Action(DISCARD), 12)]
+
+        return actions
+
+
+def generate_actions(model: CartModel, rng: random.Random, count: int) -> list[Action]:
+    # Generated on a copy, so every action is possible in the state reached by the previous ones
+    shadow = CartModel(model.catalogue, dict(model.items), model.promo_visible)
+    actions: list[Action] = []
+
+    for _ in range(count):
+        possible: list[tuple[Action, int]] = shadow.possible_actions()
+        action: Action = rng.choices([action for action, _ in possible], [weight for _, weight in possible])[0]
+
+        shadow.apply(action)
+        actions.append(action)
+
+    return actions
+
+
+def run_actions(driver: WebDriver, actions: list[Action]) -> list[Observation | str]:
+    raw_observations: list[dict] = driver.execute_async_script(
+        RUN_ACTIONS_SCRIPT, [{"kind": action.kind, "name": action.name} for action in actions],
+    )
+    invalidate_pages(driver, MenuPage, CartPreview, PromoDialog)
+
+    return [
+        raw["error"] if "error" in raw else Observation(
+            items=tuple((name, amount) for name, amount in raw["items"]),
+            total=parse_total(raw["payText"]),
+            promo_visible=raw["promoVisible"],
+        )
+        for raw in raw_observations
+    ]
+
+
+# Runs random action sequences against the page, one round-trip per batch, and compares every state reached with the
+# model. Raises AssertionError with the seed and the actions leading to the first difference.
+def explore(driver: WebDriver, catalogue: PriceCatalogue, steps: int, seed: int, batch_size: int = 50) -> CartModel:
+    rng = random.Random(seed)
+    model = CartModel(catalogue)
+    history: list[Action] = []
+
+    while len(history) < steps:
+        actions: list[Action] = generate_actions(model, rng, min(batch_size, steps - len(history)))
+
+        for action, observation in zip(actions, run_actions(driver, actions)):
+            history.append(action)
+            model.apply(action)
+
+            if observation != model.observe():
+                replay: str = "\n".join(f"  {index + 1}. {step}" for index, step in enumerate(history))
+
+                raise AssertionError(
+                    f"The page differs from the model after {len(history)} actions (seed {seed}):\n"
+                    f"{replay}\n  page:  {observation}\n  model: {model.observe()}"
+                )
+
+    return model
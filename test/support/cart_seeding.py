@@ -0,0 +1,53 @@
+import json
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.local_app import LIVE_URL
+from support.pages import MenuPage, NavigationBar, open_page
+from support.transport import run_script
+
+SEED_STORAGE_KEY = "coffee-cart-seed"
+
+PROMO_ITEM_NAME = "(Discounted) Mocha"
+
+# Order of the links in the navigation bar
+NAVIGATION_PATHS = ["", "cart", "github"]
+
+SEED_SCRIPT = "window.sessionStorage.setItem(arguments[0], arguments[1]);"
+
+
+def can_seed(base_url: str) -> bool:
+    # Only the local copy of the application reads the cart from the session storage
+    return base_url != LIVE_URL
+
+
+def seed_cart(driver: WebDriver, base_url: str, items: dict[str, int], path: str = "cart"):
+    if not can_seed(base_url):
+        order_cart(driver, base_url, items)
+
+        # A page load would drop the cart, so the application has to be left through its own router
+        if path != "":
+            NavigationBar.of(driver).follow(NAVIGATION_PATHS.index(path))
+
+        return
+
+    # The session storage belongs to the origin, so the browser has to be on the application first
+    if not driver.current_url.startswith(base_url):
+        open_page(driver, base_url)
+
+    seed = [{"name": name, "count": count} for name, count in items.items()]
+    run_script(driver, SEED_SCRIPT, SEED_STORAGE_KEY, json.dumps(seed))
+
+    open_page(driver, base_url + path)
+
+
+def order_cart(driver: WebDriver, base_url: str, items: dict[str, int]):
+    if PROMO_ITEM_NAME in items:
+        raise ValueError(f"{PROMO_ITEM_NAME} can be seeded only into the local copy of the application")
+
+    open_page(driver, base_url)
+    menu_page: MenuPage = MenuPage.of(driver)
+
+    for menu_entry in menu_page.entries:
+        for _ in range(items.get(menu_entry.name, 0)):
+            menu_page.order(menu_entry.cup)
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from support.prices import PriceCatalogue, parse_price, parse_total, parse_unit_description
+
+CART_ROW_SELECTOR = "ul:not(.cart-preview) li.list-item"
+PAY_BUTTON_SELECTOR = "div.pay-container button.pay"
+
+# Reads every row of the cart page and the pay button in a single round-trip
+CART_TABLE_SCRIPT = """
+const rows = Array.from(document.querySelectorAll(arguments[0])).map(function (row) {
+    const cells = row.querySelectorAll(":scope > div");
+    const buttons = row.querySelectorAll("div div.unit-controller button");
+
+    return {
+        element: row,
+        name: cells[0].innerText.trim(),
+        unitDescription: row.querySelector("div span.unit-desc").innerText.trim(),
+        totalText: cells[2].innerText.trim(),
+        addButton: buttons[0],
+        removeButton: buttons[1],
+        deleteButton: row.querySelector("div button[class='delete']"),
+    };
+});
+
+return {rows: rows, payText: document.querySelector(arguments[1]).innerText.trim()};
+"""
+
+
+@dataclass(frozen=True)
+class CartRow:
+    element: WebElement
+    name: str
+    # Prices are in cents
+    unit_price: int
+    amount: int
+    total: int
+    add_button: WebElement
+    remove_button: WebElement
+    delete_button: WebElement
+
+
+@dataclass(frozen=True)
+class CartTable:
+    rows: list[CartRow]
+    # Price on the pay button, in cents
+    total: int
+
+    def row(self, name: str) -> CartRow:
+        return next(row for row in self.rows if row.name == name)
+
+    def items(self) -> dict[str, int]:
+        return {row.name: row.amount for row in self.rows}
+
+    # Checks the table in cent arithmetic, without another round-trip. Returns the broken invariants.
+    def violations(self, catalogue: PriceCatalogue | None = None) -> list[str]:
+        violations: list[str] = []
+
+        for row in self.rows:
+            if row.amount <= 0:
+                violations.append(f"{row.name}: amount {row.amount} is not positive")
+
+            if row.unit_price * row.amount != row.total:
+                violations.append(f"{row.name}: {row.unit_price} x {row.amount} is not the row total {row.total}")
+
+            if catalogue is not None and row.name in catalogue.prices and catalogue[row.name] != row.unit_price:
+                violations.append(f"{row.name}: unit price {row.unit_price} is not the menu price {catalogue[row.name]}")
+
+        rows_total: int = sum(row.total for row in self.rows)
+
+        if rows_total != self.total:
+            violations.append(f"sum of the rows {rows_total} is not the pay total {self.total}")
+
+        return violations
+
+
+def snapshot_cart(driver: WebDriver) -> CartTable:
+    raw_table: dict = driver.execute_script(CART_TABLE_SCRIPT, CART_ROW_SELECTOR, PAY_BUTTON_SELECTOR)
+    rows: list[CartRow] = []
+
+    for raw_row in raw_table["rows"]:
+        unit_price, amount = parse_unit_description(raw_row["unitDescription"])
+
+        rows.append(CartRow(
+            element=raw_row["element"],
+            name=raw_row["name"],
+            unit_price=unit_price,
+            amount=amount,
+            total=parse_price(raw_row["totalText"]),
+            add_button=raw_row["addButton"],
+            remove_button=raw_row["removeButton"],
+            delete_button=raw_row["deleteButton"],
+        ))
+
+    return CartTable(rows=rows, total=parse_total(raw_table["payText"]))
@@ -0,0 +1,457 @@
+(function () {
+  "use strict";
+
+  const COFFEES = [
+    { name: "Espresso", chineseName: "特浓咖啡", price: 1000 },
+    { name: "Espresso Macchiato", chineseName: "浓缩玛奇朵", price: 1200 },
+    { name: "Cappuccino", chineseName: "卡布奇诺", price: 1900 },
+    { name: "Mocha", chineseName: "摩卡", price: 800 },
+    { name: "Flat White", chineseName: "平白咖啡", price: 1800 },
+    { name: "Americano", chineseName: "美式咖啡", price: 700 },
+    { name: "Cafe Latte", chineseName: "拿铁", price: 1600 },
+    { name: "Espresso Con Panna", chineseName: "浓缩康宝蓝", price: 1400 },
+    { name: "Cafe Breve", chineseName: "半拿铁", price: 1500 },
+  ];
+
+  const PROMO_ITEM = { name: "(Discounted) Mocha", price: 400 };
+  const ITEMS_TO_PROMO = 3;
+  const SNACKBAR_TIMEOUT = 3000;
+
+  const MENU_SCOPE = "data-v-a9662a08";
+  const NAVIGATION_SCOPE = "data-v-bb7b5941";
+  const CART_SCOPE = "data-v-8965af83";
+
+  const ROUTES = ["/", "/cart", "/github"];
+
+  // Tests can put a cart into the session storage, it is picked up once by the next page load
+  const SEED_KEY = "coffee-cart-seed";
+
+  const state = {
+    cart: new Map(),
+    promoVisible: false,
+  };
+
+  function h(tag, attributes, children) {
+    const element = document.createElement(tag);
+
+    for (const [name, value] of Object.entries(attributes || {})) {
+      if (name.startsWith("on")) {
+        element.addEventListener(name.slice(2), value);
+      } else {
+        element.setAttribute(name, value);
+      }
+    }
+
+    for (const child of children || []) {
+      element.append(child);
+    }
+
+    return element;
+  }
+
+  function formatPrice(cents) {
+    return "$" + (cents / 100).toFixed(2);
+  }
+
+  function compareNames(first, second) {
+    return first.name < second.name ? -1 : first.name > second.name ? 1 : 0;
+  }
+
+  function cartItems() {
+    return Array.from(state.cart.values()).sort(compareNames);
+  }
+
+  function cartCount() {
+    return cartItems().reduce((count, item) => count + item.count, 0);
+  }
+
+  function cartTotal() {
+    return cartItems().reduce((total, item) => total + item.count * item.price, 0);
+  }
+
+  function putItem(name, price) {
+    const item = state.cart.get(name) || { name: name, price: price, count: 0 };
+
+    item.count += 1;
+    state.cart.set(name, item);
+  }
+
+  function addItem(name, price) {
+    putItem(name, price);
+    state.promoVisible = false;
+    render();
+  }
+
+  // Only coffees ordered from the menu can trigger the promo, discounted items count towards it as well
+  function orderCoffee(coffee) {
+    putItem(coffee.name, coffee.price);
+    state.promoVisible = cartCount() % ITEMS_TO_PROMO === 0;
+    render();
+  }
+
+  function removeItem(name) {
+    const item = state.cart.get(name);
+
+    item.count -= 1;
+
+    if (item.count === 0) {
+      state.cart.delete(name);
+    }
+
+    state.promoVisible = false;
+    render();
+  }
+
+  function deleteItem(name) {
+    state.cart.delete(name);
+    state.promoVisible = false;
+    render();
+  }
+
+  function clearCart() {
+    state.cart.clear();
+    state.promoVisible = false;
+    render();
+  }
+
+  function priceOf(name) {
+    const product = COFFEES.concat([PROMO_ITEM]).find((candidate) => candidate.name === name);
+
+    if (!product) {
+      throw new Error("Unknown cart item: " + name);
+    }
+
+    return product.price;
+  }
+
+  function loadSeed() {
+    const seed = sessionStorage.getItem(SEED_KEY);
+
+    if (seed === null) {
+      return;
+    }
+
+    sessionStorage.removeItem(SEED_KEY);
+
+    for (const item of JSON.parse(seed)) {
+      state.cart.set(item.name, { name: item.name, price: priceOf(item.name), count: item.count });
+    }
+  }
+
+  // Rows are kept per item name and patched in place, like the original keyed v-for lists,
+  // so element references held by the tests stay valid while the cart changes
+  function syncRows(list, offset, createRow, updateRow) {
+    const rows = list.rows || (list.rows = new Map());
+
+    for (const [name, row] of rows) {
+      if (!state.cart.has(name)) {
+        row.remove();
+        rows.delete(name);
+      }
+    }
+
+    cartItems().forEach((item, index) => {
+      let row = rows.get(item.name);
+
+      if (!row) {
+        row = createRow(item);
+        rows.set(item.name, row);
+      }
+
+      updateRow(row, item);
+
+      const reference = list.children[index + offset] || null;
+
+      if (reference !== row) {
+        list.insertBefore(row, reference);
+      }
+    });
+  }
+
+  function unitController(item) {
+    return h("div", { class: "unit-controller" }, [
+      h("button", { "aria-label": "Add one " + item.name, onclick: () => addItem(item.name, item.price) }, ["+"]),
+      h("button", { "aria-label": "Remove one " + item.name, onclick: () => removeItem(item.name) }, ["-"]),
+    ]);
+  }
+
+  function createNavigation() {
+    const links = ROUTES.map((route) => h("a", { href: route, onclick: followLink }, []));
+    const element = h("ul", { [NAVIGATION_SCOPE]: "" }, links.map((link) => h("li", { [NAVIGATION_SCOPE]: "" }, [link])));
+
+    function update() {
+      const labels = ["menu", "cart (" + cartCount() + ")", "github"];
+
+      links.forEach((link, index) => {
+        link.textContent = labels[index];
+        link.classList.toggle("router-link-exact-active", ROUTES[index] === location.pathname);
+      });
+    }
+
+    return { element: element, update: update };
+  }
+
+  function createMenuView() {
+    const entries = COFFEES.map((coffee) => {
+      const name = document.createTextNode(coffee.name + " ");
+      let chinese = false;
+
+      const header = h("h4", {
+        [MENU_SCOPE]: "",
+        ondblclick: () => {
+          chinese = !chinese;
+          name.textContent = (chinese ? coffee.chineseName : coffee.name) + " ";
+        },
+      }, [name, h("small", { [MENU_SCOPE]: "" }, [formatPrice(coffee.price)])]);
+
+      const cup = h("div", { class: "cup", "data-test": coffee.name.replace(/ /g, "_"), onclick: () => orderCoffee(coffee) }, [
+        h("div", { class: "cup-body" }, []),
+      ]);
+
+      return h("li", { [MENU_SCOPE]: "" }, [header, h("div", { [MENU_SCOPE]: "" }, [cup])]);
+    });
+
+    const menu = h("ul", { [MENU_SCOPE]: "" }, entries);
+    const element = h("div", {}, [menu]);
+    let promo = null;
+
+    function acceptPromo() {
+      addItem(PROMO_ITEM.name, PROMO_ITEM.price);
+    }
+
+    function discardPromo() {
+      state.promoVisible = false;
+      render();
+    }
+
+    function update() {
+      if (state.promoVisible && !promo) {
+        promo = h("div", { class: "promo" }, [
+          h("span", {}, ["It's your lucky day! Get an extra cup of Mocha for $4."]),
+          h("div", { class: "buttons" }, [
+            h("button", { class: "yes", onclick: acceptPromo }, ["Yes, of course!"]),
+            h("button", { onclick: discardPromo }, ["Nah, I'll skip."]),
+          ]),
+        ]);
+        element.append(promo);
+      } else if (!state.promoVisible && promo) {
+        promo.remove();
+        promo = null;
+      }
+    }
+
+    return { element: element, update: update };
+  }
+
+  function createCartView() {
+    const element = h("div", { class: "list" }, []);
+    let empty = null;
+    let list = null;
+
+    function createRow(item) {
+      return h("li", { class: "list-item", [CART_SCOPE]: "" }, [
+        h("div", {}, [item.name]),
+        h("div", {}, [h("span", { class: "unit-desc" }, []), unitController(item)]),
+        h("div", {}, []),
+        h("div", {}, [h("button", { class: "delete", onclick: () => deleteItem(item.name) }, ["x"])]),
+      ]);
+    }
+
+    function updateRow(row, item) {
+      row.querySelector("span.unit-desc").textContent = formatPrice(item.price) + " x " + item.count;
+      row.children[2].textContent = formatPrice(item.price * item.count);
+    }
+
+    function update() {
+      if (state.cart.size === 0) {
+        if (list) {
+          list.parentElement.remove();
+          list = null;
+        }
+
+        if (!empty) {
+          empty = h("p", {}, ["No coffee, go add some."]);
+          element.append(empty);
+        }
+
+        return;
+      }
+
+      if (empty) {
+        empty.remove();
+        empty = null;
+      }
+
+      if (!list) {
+        const header = h("li", { class: "list-header", [CART_SCOPE]: "" }, [
+          h("div", {}, ["Item"]),
+          h("div", {}, ["Unit"]),
+          h("div", {}, ["Total"]),
+          h("div", {}, []),
+        ]);
+
+        list = h("ul", { [CART_SCOPE]: "" }, [header]);
+        element.append(h("div", {}, [list]));
+      }
+
+      syncRows(list, 1, createRow, updateRow);
+    }
+
+    return { element: element, update: update };
+  }
+
+  function createGithubView() {
+    const element = h("div", { class: "github" }, [
+      h("p", {}, [
+        "Source code: ",
+        h("a", { href: "https://github.com/jecfish/coffee-cart" }, ["jecfish/coffee-cart"]),
+      ]),
+    ]);
+
+    return { element: element, update: () => {} };
+  }
+
+  function createPayContainer() {
+    const button = h("button", { class: "pay", "data-test": "checkout", onclick: openModal }, []);
+    const element = h("div", { class: "pay-container" }, [button]);
+    let preview = null;
+
+    function createRow(item) {
+      return h("li", { class: "list-item" }, [
+        h("span", {}, [item.name]),
+        h("span", { class: "unit-desc" }, []),
+        unitController(item),
+      ]);
+    }
+
+    function updateRow(row, item) {
+      row.querySelector("span.unit-desc").textContent = " x " + item.count;
+    }
+
+    function update() {
+      button.textContent = "Total: " + formatPrice(cartTotal());
+
+      if (state.cart.size === 0) {
+        if (preview) {
+          preview.remove();
+          preview = null;
+        }
+
+        return;
+      }
+
+      if (!preview) {
+        preview = h("ul", { class: "cart-preview" }, []);
+        element.append(preview);
+      }
+
+      syncRows(preview, 0, createRow, updateRow);
+    }
+
+    return { element: element, update: update };
+  }
+
+  function createModal() {
+    const form = h("form", { onsubmit: submitPayment }, [
+      h("h1", {}, ["Payment details"]),
+      h("label", { for: "name" }, ["Name"]),
+      h("input", { id: "name", name: "name", type: "text", required: "" }, []),
+      h("label", { for: "email" }, ["Email"]),
+      h("input", { id: "email", name: "email", type: "email", required: "" }, []),
+      h("label", {}, [
+        h("input", { id: "promotion", name: "promotion", type: "checkbox" }, []),
+        " I would like to receive order updates and promotional messages.",
+      ]),
+      h("button", { id: "submit-payment", type: "submit" }, ["Submit"]),
+    ]);
+
+    const element = h("div", {
+      class: "modal",
+      onclick: (event) => {
+        if (event.target === element) {
+          closeModal();
+        }
+      },
+    }, [h("div", { class: "modal-content", "data-cy": "payment-details" }, [form])]);
+
+    return { element: element, form: form };
+  }
+
+  const navigation = createNavigation();
+  const main = h("main", {}, []);
+  const payContainer = createPayContainer();
+  const modal = createModal();
+  const app = document.getElementById("app");
+
+  let view = null;
+  let snackbar = null;
+  let snackbarTimer = null;
+
+  function openModal() {
+    modal.element.classList.add("open");
+  }
+
+  function closeModal() {
+    modal.element.classList.remove("open");
+  }
+
+  function submitPayment(event) {
+    event.preventDefault();
+
+    closeModal();
+    modal.form.reset();
+    clearCart();
+    showSnackbar("Thanks for your purchase. Please check your email for payment.");
+  }
+
+  function showSnackbar(message) {
+    if (!snackbar) {
+      snackbar = h("div", { class: "snackbar success" }, []);
+      app.append(snackbar);
+    }
+
+    snackbar.textContent = message;
+    snackbar.classList.remove("hidden");
+
+    clearTimeout(snackbarTimer);
+    snackbarTimer = setTimeout(() => snackbar.classList.add("hidden"), SNACKBAR_TIMEOUT);
+  }
+
+  function followLink(event) {
+    event.preventDefault();
+    navigate(event.currentTarget.getAttribute("href"));
+  }
+
+  function navigate(path) {
+    if (path !== location.pathname) {
+      history.pushState({}, "", path);
+    }
+
+    renderRoute();
+  }
+
+  function renderRoute() {
+    if (location.pathname === "/cart") {
+      view = createCartView();
+    } else if (location.pathname === "/github") {
+      view = createGithubView();
+    } else {
+      view = createMenuView();
+    }
+
+    main.replaceChildren(view.element);
+    render();
+  }
+
+  function render() {
+    navigation.update();
+    view.update();
+    payContainer.update();
+  }
+
+  window.addEventListener("popstate", renderRoute);
+
+  loadSeed();
+  app.append(navigation.element, main, payContainer.element, modal.element);
+  renderRoute();
+})();
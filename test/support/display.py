@@ -0,0 +1,64 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+X11_SOCKET_DIRECTORY = Path("/tmp/.X11-unix")
+SCREEN = "1920x1080x24"
+
+
+def has_display() -> bool:
+    if not sys.platform.startswith("linux"):
+        return True
+
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def can_start_virtual_display() -> bool:
+    return shutil.which("Xvfb") is not None
+
+
+def free_display_number() -> int:
+    for number in range(99, 200):
+        if not (X11_SOCKET_DIRECTORY / f"X{number}").exists() and not Path(f"/tmp/.X{number}-lock").exists():
+            return number
+
+    raise RuntimeError("No free X display number")
+
+
+class VirtualDisplay:
+    def __init__(self, startup_timeout: float = 5.0):
+        self.startup_timeout = startup_timeout
+        self.process: subprocess.Popen | None = None
+        self.display: str | None = None
+
+    def start(self) -> str:
+        number: int = free_display_number()
+
+        self.process = subprocess.Popen(
+            ["Xvfb", f":{number}", "-screen", "0", SCREEN, "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.display = f":{number}"
+
+        deadline: float = time.monotonic() + self.startup_timeout
+
+        while not (X11_SOCKET_DIRECTORY / f"X{number}").exists():
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Xvfb did not start on display :{number}")
+
+            time.sleep(0.05)
+
+        return self.display
+
+    def stop(self):
+        if self.process is None:
+            return
+
+        self.process.terminate()
+        self.process.wait()
+        self.process = None
@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from selenium.common import WebDriverException
+from selenium.webdriver.common.driver_finder import DriverFinder
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+
+from support.timing import timing_log
+
+GECKODRIVER_ENV = "GECKODRIVER_PATH"
+
+SNAP_PATH = Path("/snap/bin/geckodriver")
+SELENIUM_CACHE = Path.home() / ".cache" / "selenium" / "geckodriver"
+
+
+def driver_version(path: Path) -> tuple[int, ...]:
+    # Selenium Manager keeps every driver in a directory named after its version, e.g. linux64/0.36.0/geckodriver
+    return tuple(int(part) for part in re.findall(r"\d+", path.parent.name))
+
+
+def find_geckodriver() -> str:
+    if os.environ.get(GECKODRIVER_ENV):
+        return os.environ[GECKODRIVER_ENV]
+
+    on_path: str | None = shutil.which("geckodriver")
+
+    if on_path is not None:
+        return on_path
+
+    if SNAP_PATH.exists():
+        return str(SNAP_PATH)
+
+    # Drivers downloaded earlier by Selenium Manager, the newest version first
+    cached: list[Path] = sorted(SELENIUM_CACHE.glob("*/*/geckodriver*"), key=driver_version, reverse=True)
+
+    if cached:
+        return str(cached[0])
+
+    # Selenium Manager downloads a matching driver as the last resort
+    return DriverFinder(Service(), Options()).get_driver_path()
+
+
+def service_status(service: Service) -> dict:
+    with urllib.request.urlopen(f"{service.service_url}/status", timeout=2) as response:
+        return json.load(response)["value"]
+
+
+class GeckodriverManager:
+    def __init__(self, executable_path: str | None = None):
+        self.executable_path = executable_path or find_geckodriver()
+
+        # Geckodriver serves one session at a time, so idle services wait here for the next session
+        self._idle: dict[tuple, list[Service]] = {}
+        self._running: list[Service] = []
+        self._lock = threading.Lock()
+
+        self.startup_times: list[float] = []
+
+    def _start(self, env: dict[str, str] | None) -> Service:
+        service = Service(self.executable_path, env=env)
+
+        start = time.perf_counter()
+        service.start()
+        startup_time = time.perf_counter() - start
+
+        self.startup_times.append(startup_time)
+        timing_log.record_command("startGeckodriver", None, startup_time)
+
+        with self._lock:
+            self._running.append(service)
+
+        return service
+
+    def _is_healthy(self, service: Service) -> bool:
+        try:
+            return service.is_connectable() and service_status(service)["ready"]
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def acquire(self, env: dict[str, str] | None = None) -> Service:
+        key: tuple = tuple(sorted(env.items())) if env else ()
+
+        while True:
+            with self._lock:
+                idle: list[Service] = self._idle.get(key, [])
+                service: Service | None = idle.pop() if idle else None
+
+            if service is None:
+                return self._start(env)
+
+            if self._is_healthy(service):
+                return service
+
+            self._stop(service)
+
+    def release(self, service: Service, env: dict[str, str] | None = None):
+        key: tuple = tuple(sorted(env.items())) if env else ()
+
+        with self._lock:
+            self._idle.setdefault(key, []).append(service)
+
+    def _stop(self, service: Service):
+        with self._lock:
+            if service in self._running:
+                self._running.remove(service)
+
+        try:
+            service.stop()
+        except WebDriverException:
+            pass
+
+    def close(self):
+        with self._lock:
+            services: list[Service] = list(self._running)
+            self._idle.clear()
+
+        for service in services:
+            self._stop(service)
@@ -0,0 +1,48 @@
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+APP_DIRECTORY = Path(__file__).parent / "coffee_cart_app"
+
+LIVE_URL = "https://coffee-cart.app/"
+
+# Paths handled by the client side router, all of them are served the application shell
+APP_ROUTES = ["/", "/cart", "/github"]
+
+
+class AppRequestHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] in APP_ROUTES:
+            self.path = "/index.html"
+
+        super().do_GET()
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalCoffeeCart:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        handler = partial(AppRequestHandler, directory=str(APP_DIRECTORY))
+
+        # Port 0 lets the system choose a free port, so parallel workers never collide
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="local-coffee-cart", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
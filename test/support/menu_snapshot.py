@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from support.prices import PriceCatalogue, parse_price
+
+MENU_ENTRY_SELECTOR = "li[data-v-a9662a08]"
+
+# Reads every menu entry in a single round-trip instead of several find_element and text calls per entry
+MENU_SNAPSHOT_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (entry) {
+    const header = entry.querySelector("h4");
+    const headerText = header.innerText.trim();
+    const priceText = header.querySelector("small").innerText.trim();
+
+    return {
+        element: entry,
+        header: header,
+        cup: entry.querySelector("div div.cup"),
+        name: headerText.slice(0, headerText.length - priceText.length).trim(),
+        priceText: priceText,
+    };
+});
+"""
+
+
+@dataclass(frozen=True)
+class MenuEntry:
+    element: WebElement
+    header: WebElement
+    cup: WebElement
+    name: str
+    price_text: str
+    # In cents
+    price: int
+
+
+def snapshot_menu(driver: WebDriver) -> list[MenuEntry]:
+    raw_entries: list[dict] = driver.execute_script(MENU_SNAPSHOT_SCRIPT, MENU_ENTRY_SELECTOR)
+
+    return [
+        MenuEntry(
+            element=raw_entry["element"],
+            header=raw_entry["header"],
+            cup=raw_entry["cup"],
+            name=raw_entry["name"],
+            price_text=raw_entry["priceText"],
+            price=parse_price(raw_entry["priceText"]),
+        )
+        for raw_entry in raw_entries
+    ]
+
+
+def read_catalogue(driver: WebDriver) -> PriceCatalogue:
+    return PriceCatalogue({entry.name: entry.price for entry in snapshot_menu(driver)})
@@ -0,0 +1,385 @@
+import hashlib
+import http.client
+import json
+import mimetypes
+import os
+import selectors
+import socket
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+from support.parallel import is_worker
+from support.timing import timing_log
+
+WORKER_OUTPUT_KEY = "coffeecart_network"
+
+OFF = "off"
+
+# Never forwarded between the browser and the server
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-connection", "proxy-authorization", "te", "trailer", "transfer-encoding", "upgrade",
+}
+
+# Conditional request headers, a browser sending them revalidates its own copy
+VALIDATOR_HEADERS = {"if-none-match", "if-modified-since"}
+
+# Cache-Control directives of responses which must not be kept in a cache shared by every browser
+UNCACHEABLE_DIRECTIVES = {"no-store", "private"}
+
+TUNNEL_BUFFER_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class NetworkPolicy:
+    name: str
+    # Hosts which are never contacted, subdomains included
+    blocked_hosts: tuple[str, ...] = ()
+    # Resources answered with an empty response of the right type, none of the assertions reads them
+    stubbed_extensions: tuple[str, ...] = ()
+    # Static resources kept in the shared on-disk cache and revalidated instead of downloaded
+    cached_extensions: tuple[str, ...] = (".css", ".js", ".woff", ".woff2", ".ttf", ".png", ".jpg", ".svg", ".ico")
+    preferences: dict = field(default_factory=dict)
+
+    def is_blocked(self, host: str) -> bool:
+        return any(host == blocked or host.endswith("." + blocked) for blocked in self.blocked_hosts)
+
+    def is_stubbed(self, path: str) -> bool:
+        return path.lower().endswith(self.stubbed_extensions)
+
+    def is_cached(self, path: str) -> bool:
+        return path.lower().endswith(self.cached_extensions)
+
+
+POLICIES: dict[str, NetworkPolicy | None] = {
+    OFF: None,
+    "cache": NetworkPolicy("cache"),
+    "lean": NetworkPolicy(
+        "lean",
+        blocked_hosts=(
+            "google-analytics.com", "googletagmanager.com", "fonts.googleapis.com", "fonts.gstatic.com",
+            "githubassets.com", "githubusercontent.com", "collector.github.com",
+        ),
+        stubbed_extensions=(".woff", ".woff2", ".ttf", ".otf", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico"),
+        preferences={"network.prefetch-next": False, "network.dns.disablePrefetch": True},
+    ),
+}
+
+
+def new_traffic() -> dict:
+    return {"requests": 0, "bytes": 0, "requests_saved": 0, "bytes_saved": 0}
+
+
+class NetworkLog:
+    def __init__(self):
+        self.tests: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, transferred: int = 0, saved: int = 0, requests_saved: int = 0):
+        # Requests are booked to the test running when the browser sent them
+        with self._lock:
+            traffic: dict = self.tests.setdefault(timing_log.current_test, new_traffic())
+            traffic["requests"] += 1
+            traffic["bytes"] += transferred
+            traffic["bytes_saved"] += saved
+            traffic["requests_saved"] += requests_saved
+
+    def total(self) -> dict:
+        total: dict = new_traffic()
+
+        for traffic in self.tests.values():
+            for key, value in traffic.items():
+                total[key] += value
+
+        return total
+
+    def merge(self, tests: dict[str, dict]):
+        for nodeid, traffic in tests.items():
+            merged: dict = self.tests.setdefault(nodeid, new_traffic())
+
+            for key, value in traffic.items():
+                merged[key] += value
+
+
+network_log = NetworkLog()
+
+
+class ResourceCache:
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> Path:
+        return self.directory / (hashlib.sha256(url.encode()).hexdigest() + suffix)
+
+    def get(self, url: str) -> tuple[dict, bytes] | None:
+        try:
+            meta: dict = json.loads(self._path(url, ".json").read_text())
+            body: bytes = self._path(url, ".body").read_bytes()
+        except (OSError, ValueError):
+            return None
+
+        return meta, body
+
+    def put(self, url: str, headers: list[tuple[str, str]], body: bytes):
+        # Several workers share the directory, every file is replaced atomically
+        self._write(self._path(url, ".body"), body)
+        self._write(self._path(url, ".json"), json.dumps({"url": url, "headers": headers}).encode())
+
+    def discard(self, url: str):
+        for suffix in [".json", ".body"]:
+            self._path(url, suffix).unlink(missing_ok=True)
+
+    def known_size(self, url: str) -> int:
+        try:
+            return self._path(url, ".body").stat().st_size
+        except OSError:
+            return 0
+
+    def _write(self, path: Path, data: bytes):
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+
+        os.replace(temporary, path)
+
+
+class PolicyRequestHandler(BaseHTTPRequestHandler):
+    server: "PolicyProxy"
+
+    def do_CONNECT(self):
+        host, _, port = self.path.rpartition(":")
+
+        # Without intercepting TLS the secure traffic can only be blocked by host or passed through
+        if self.server.policy.is_blocked(host):
+            network_log.record(requests_saved=1)
+            self.send_error(403, "Blocked by the network policy")
+            return
+
+        try:
+            upstream: socket.socket = socket.create_connection((host, int(port)), timeout=30)
+        except OSError:
+            self.send_error(502)
+            return
+
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+
+        network_log.record(transferred=self._tunnel(upstream))
+
+    def _tunnel(self, upstream: socket.socket) -> int:
+        transferred = 0
+        peers: dict[socket.socket, socket.socket] = {self.connection: upstream, upstream: self.connection}
+
+        with upstream, selectors.DefaultSelector() as selector:
+            for peer in peers:
+                selector.register(peer, selectors.EVENT_READ)
+
+            while True:
+                for key, _ in selector.select(timeout=30):
+                    data: bytes = key.fileobj.recv(TUNNEL_BUFFER_SIZE)
+
+                    if not data:
+                        return transferred
+
+                    peers[key.fileobj].sendall(data)
+                    transferred += len(data)
+
+    def do_GET(self):
+        self._proxy()
+
+    def do_HEAD(self):
+        self._proxy()
+
+    def do_POST(self):
+        self._proxy()
+
+    def _proxy(self):
+        url = urlsplit(self.path)
+        policy: NetworkPolicy = self.server.policy
+        cache: ResourceCache = self.server.cache
+
+        if policy.is_blocked(url.hostname or ""):
+            network_log.record(saved=cache.known_size(self.path), requests_saved=1)
+            self._reply(204, [], b"")
+            return
+
+        if policy.is_stubbed(url.path):
+            network_log.record(saved=cache.known_size(self.path), requests_saved=1)
+            content_type: str = mimetypes.guess_type(url.path)[0] or "application/octet-stream"
+            self._reply(200, [("Content-Type", content_type)], b"")
+            return
+
+        headers: dict[str, str] = {
+            name: value for name, value in self.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS
+        }
+        cached: tuple[dict, bytes] | None = None
+        revalidating: bool = any(name.lower() in VALIDATOR_HEADERS for name in headers)
+
+        # A revalidation of the browser's own copy is forwarded as it is, its 304 goes back to the browser
+        if self.command == "GET" and policy.is_cached(url.path) and not revalidating:
+            cached = cache.get(self.path)
+
+            if cached is not None:
+                headers.update(validators(cached[0]["headers"]))
+
+        length: int = int(self.headers.get("Content-Length", 0))
+        request_body: bytes | None = self.rfile.read(length) if length else None
+        target: str = url.path + (f"?{url.query}" if url.query else "")
+
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+
+        try:
+            connection.request(self.command, target, body=request_body, headers=headers)
+            response: http.client.HTTPResponse = connection.getresponse()
+            body: bytes = response.read()
+        except OSError:
+            self.send_error(502)
+            return
+        finally:
+            connection.close()
+
+        response_headers: list[tuple[str, str]] = [
+            (name, value) for name, value in response.getheaders() if name.lower() not in HOP_BY_HOP_HEADERS
+        ]
+
+        if response.status == 304 and cached is not None:
+            # The proxy revalidated its own copy, the browser asked for the whole resource and gets it from the cache
+            network_log.record(transferred=len(body), saved=len(cached[1]))
+            self._reply(200, cached[0]["headers"], cached[1])
+            return
+
+        if response.status == 200 and self.command == "GET" and policy.is_cached(url.path):
+            if not is_storable(response_headers):
+                # A copy kept by an earlier run would still be counted as saved traffic
+                cache.discard(self.path)
+            elif validators(response_headers):
+                cache.put(self.path, response_headers, body)
+
+        network_log.record(transferred=len(body))
+        self._reply(response.status, response_headers, body)
+
+    def _reply(self, status: int, headers: list[tuple[str, str]], body: bytes):
+        self.send_response(status)
+
+        for name, value in headers:
+            if name.lower() != "content-length":
+                self.send_header(name, value)
+
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def validators(headers: list[tuple[str, str]]) -> dict[str, str]:
+    conditions: dict[str, str] = {}
+
+    for name, value in headers:
+        if name.lower() == "etag":
+            conditions["If-None-Match"] = value
+        elif name.lower() == "last-modified":
+            conditions["If-Modified-Since"] = value
+
+    return conditions
+
+
+def is_storable(headers: list[tuple[str, str]]) -> bool:
+    directives: set[str] = {
+        directive.split("=")[0].strip().lower()
+        for name, value in headers if name.lower() == "cache-control"
+        for directive in value.split(",")
+    }
+
+    return not directives & UNCACHEABLE_DIRECTIVES
+
+
+class PolicyProxy(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, policy: NetworkPolicy, cache_directory: Path, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), PolicyRequestHandler)
+        self.policy = policy
+        self.cache = ResourceCache(cache_directory)
+        self.thread = threading.Thread(target=self.serve_forever, name="network-policy-proxy", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def preferences(self) -> dict:
+        host, port = self.server_address[:2]
+
+        return {
+            "network.proxy.type": 1,
+            "network.proxy.http": host,
+            "network.proxy.http_port": port,
+            "network.proxy.ssl": host,
+            "network.proxy.ssl_port": port,
+            "network.proxy.no_proxies_on": "",
+            # The local copy of the application is on 127.0.0.1, which is never proxied by default
+            "network.proxy.allow_hijacking_localhost": True,
+            **self.policy.preferences,
+        }
+
+
+def format_bytes(size: int) -> str:
+    for unit in ["B", "kB", "MB"]:
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+
+        size /= 1024
+
+    return f"{size:.1f}GB"
+
+
+class NetworkReport:
+    def __init__(self, config: pytest.Config):
+        self.config = config
+
+    def pytest_testnodedown(self, node, error):
+        tests: dict | None = node.workeroutput.get(WORKER_OUTPUT_KEY)
+
+        if tests is not None:
+            network_log.merge(tests)
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        if is_worker(self.config):
+            self.config.workeroutput[WORKER_OUTPUT_KEY] = network_log.tests
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if is_worker(self.config) or not network_log.tests:
+            return
+
+        top: int = self.config.getoption("timing_top")
+        total: dict = network_log.total()
+
+        terminalreporter.section(f"network policy {self.config.getoption('network_policy')}")
+        terminalreporter.write_line(
+            f"{total['requests']} requests, {format_bytes(total['bytes'])} transferred, "
+            f"{total['requests_saved']} requests and {format_bytes(total['bytes_saved'])} saved"
+        )
+
+        tests: list[tuple[str, dict]] = sorted(
+            network_log.tests.items(), key=lambda item: (item[1]["bytes_saved"], item[1]["requests_saved"]), reverse=True,
+        )
+
+        for nodeid, traffic in tests[:top]:
+            terminalreporter.write_line(
+                f"  {traffic['requests_saved']} requests, {format_bytes(traffic['bytes_saved'])} saved {nodeid} "
+                f"({traffic['requests']} requests, {format_bytes(traffic['bytes'])} transferred)"
+            )
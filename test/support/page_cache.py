@@ -0,0 +1,110 @@
+from weakref import WeakKeyDictionary
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.animations import apply_animation_mode
+from support.pages import invalidate_pages, open_page
+from support.transport import run_script
+
+VALID = "valid"
+MOVED = "moved"
+DIRTY = "dirty"
+
+# A warm tab can be reused while it shows the page it was loaded with, nothing was stored, the cart is empty, no dialog is
+# open and the checkout form holds its default values
+PAGE_STATE_SCRIPT = """
+const url = arguments[0];
+const clearStorage = arguments[1];
+
+if (clearStorage) {
+    window.localStorage.clear();
+    window.sessionStorage.clear();
+}
+
+if (document.readyState !== "complete" || window.localStorage.length > 0 || window.sessionStorage.length > 0) {
+    return "dirty";
+}
+
+const cartLink = Array.from(document.querySelectorAll("#app ul[data-v-bb7b5941] li a"))
+    .find((anchor) => anchor.innerText.trim().startsWith("cart"));
+
+if (cartLink !== undefined && cartLink.innerText.trim() !== "cart (0)") {
+    return "dirty";
+}
+
+if (document.querySelector("div.promo") !== null || document.querySelector(".modal.open") !== null) {
+    return "dirty";
+}
+
+const edited = Array.from(document.querySelectorAll("#app input, #app textarea")).some((field) =>
+    field.type === "checkbox" || field.type === "radio" ? field.checked !== field.defaultChecked : field.value !== field.defaultValue);
+
+if (edited) {
+    return "dirty";
+}
+
+return window.location.href === url ? "valid" : "moved";
+"""
+
+_warm_tabs: WeakKeyDictionary[WebDriver, dict[str, str]] = WeakKeyDictionary()
+_used_tabs: WeakKeyDictionary[WebDriver, set[str]] = WeakKeyDictionary()
+
+
+def page_state(driver: WebDriver, url: str, clear_storage: bool = False) -> str:
+    return run_script(driver, PAGE_STATE_SCRIPT, url, clear_storage)
+
+
+def open_cached_page(driver: WebDriver, url: str):
+    warm_tabs: dict[str, str] = _warm_tabs.setdefault(driver, {})
+    handle: str | None = warm_tabs.get(url)
+
+    if handle is not None and handle in driver.window_handles:
+        driver.switch_to.window(handle)
+        invalidate_pages(driver)
+        _used_tabs.setdefault(driver, set()).add(handle)
+
+        state: str = page_state(driver, url)
+
+        # Following a link inside the application is undone by the history, without loading the page again
+        if state == MOVED:
+            driver.back()
+            invalidate_pages(driver)
+            state = page_state(driver, url)
+
+        if state != VALID:
+            open_page(driver, url)
+        else:
+            # The tab may have been loaded by a test running in the other animation mode
+            apply_animation_mode(driver)
+
+        return
+
+    driver.switch_to.new_window("tab")
+    open_page(driver, url)
+
+    warm_tabs[url] = driver.current_window_handle
+    _used_tabs.setdefault(driver, set()).add(driver.current_window_handle)
+
+
+def release_warm_tabs(driver: WebDriver) -> set[str]:
+    warm_tabs: dict[str, str] = _warm_tabs.get(driver, {})
+    used_tabs: set[str] = _used_tabs.pop(driver, set())
+    handles: list[str] = driver.window_handles
+
+    for url, handle in list(warm_tabs.items()):
+        if handle not in handles:
+            del warm_tabs[url]
+            continue
+
+        if handle not in used_tabs:
+            continue
+
+        # Cookies and storage are shared with the other tabs of the origin, so they are cleared here as well,
+        # the first tab may be left on about:blank where the origin's cookies cannot be reached
+        driver.switch_to.window(handle)
+        driver.delete_all_cookies()
+
+        if page_state(driver, url, clear_storage=True) == DIRTY:
+            del warm_tabs[url]
+
+    return set(warm_tabs.values())
@@ -0,0 +1,246 @@
+from typing import Callable, TypeVar
+from weakref import WeakKeyDictionary
+
+from selenium.common import StaleElementReferenceException
+from selenium.webdriver import ActionChains
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from support.animations import apply_animation_mode
+from support.menu_snapshot import MenuEntry, snapshot_menu
+
+T = TypeVar("T")
+P = TypeVar("P", bound="PageObject")
+
+_page_objects: WeakKeyDictionary[WebDriver, dict[type, "PageObject"]] = WeakKeyDictionary()
+
+
+def invalidate_pages(driver: WebDriver, *page_types: type):
+    for page_type, page_object in _page_objects.get(driver, {}).items():
+        if not page_types or page_type in page_types:
+            page_object.invalidate()
+
+
+def open_page(driver: WebDriver, url: str):
+    driver.get(url)
+    invalidate_pages(driver)
+    apply_animation_mode(driver)
+
+
+def reload_page(driver: WebDriver):
+    driver.refresh()
+    invalidate_pages(driver)
+    apply_animation_mode(driver)
+
+
+class PageObject:
+    def __init__(self, driver: WebDriver):
+        self.driver = driver
+        self._elements: dict[tuple, WebElement | list[WebElement]] = {}
+
+    @classmethod
+    def of(cls: type[P], driver: WebDriver) -> P:
+        page_objects: dict[type, PageObject] = _page_objects.setdefault(driver, {})
+
+        if cls not in page_objects:
+            page_objects[cls] = cls(driver)
+
+        return page_objects[cls]
+
+    def _cached(self, key: tuple, locate: Callable[[], T]) -> T:
+        # Only found elements are cached, a missing element is looked up again on the next call
+        if key not in self._elements:
+            self._elements[key] = locate()
+
+        return self._elements[key]
+
+    def _retrying(self, action: Callable[[], T], retry: Callable[[], T] | None = None) -> T:
+        # A stale reference clears the cache, the retry locates the elements again
+        try:
+            return action()
+        except StaleElementReferenceException:
+            self.invalidate()
+            return (retry or action)()
+
+    def _relocate(self, entry: WebElement) -> Callable[[], WebElement]:
+        # An entry handed out from the cached list is found again at the same position after a retry
+        cached: list[WebElement] = self._elements.get(("entries",), [])
+        position: int | None = next((index for index, candidate in enumerate(cached) if candidate == entry), None)
+
+        if position is None:
+            return lambda: entry
+
+        return lambda: self.entries[position]
+
+    def invalidate(self):
+        self._elements.clear()
+
+
+class NavigationBar(PageObject):
+    @property
+    def element(self) -> WebElement:
+        return self._cached(("navigation",), lambda: self.driver.find_element(By.CSS_SELECTOR, "#app ul[data-v-bb7b5941]"))
+
+    @property
+    def links(self) -> list[WebElement]:
+        return self._cached(("links",), lambda: self.element.find_elements(By.CSS_SELECTOR, "li[data-v-bb7b5941]"))
+
+    def anchor(self, link: WebElement) -> WebElement:
+        return self._cached(("anchor", link.id), lambda: link.find_element(By.TAG_NAME, "a"))
+
+    def follow(self, link_index: int):
+        self._retrying(lambda: self.anchor(self.links[link_index]).click())
+        invalidate_pages(self.driver)
+
+
+class MenuPage(PageObject):
+    @property
+    def entries(self) -> list[MenuEntry]:
+        return self._cached(("entries",), lambda: snapshot_menu(self.driver))
+
+    @property
+    def pay_button(self) -> WebElement:
+        return self._cached(("pay_button",), lambda: self.driver.find_element(By.CSS_SELECTOR, "button.pay"))
+
+    def names(self) -> list[str]:
+        # Names change on double click, so they are always read again
+        self._elements[("entries",)] = snapshot_menu(self.driver)
+
+        return [entry.name for entry in self.entries]
+
+    def _relocate_cup(self, cup: WebElement) -> Callable[[], WebElement]:
+        cached: list[MenuEntry] = self._elements.get(("entries",), [])
+        position: int | None = next((index for index, entry in enumerate(cached) if entry.cup == cup), None)
+
+        if position is not None:
+            return lambda: self.entries[position].cup
+
+        # A cup from an earlier snapshot is found again by its data-test attribute, read while the reference is valid
+        data_test: str = cup.get_dom_attribute("data-test")
+
+        return lambda: self.driver.find_element(By.CSS_SELECTOR, f'div.cup[data-test="{data_test}"]')
+
+    def order(self, cup: WebElement):
+        relocate: Callable[[], WebElement] = self._relocate_cup(cup)
+        self._retrying(cup.click, lambda: relocate().click())
+        invalidate_pages(self.driver, CartPreview, PromoDialog)
+
+    def hover_over_pay_button(self):
+        self._retrying(lambda: ActionChains(self.driver).move_to_element(self.pay_button).perform())
+
+
+class CartPreview(PageObject):
+    @property
+    def element(self) -> WebElement:
+        return self._cached(("preview",), lambda: self.driver.find_element(By.CSS_SELECTOR, "ul.cart-preview"))
+
+    @property
+    def entries(self) -> list[WebElement]:
+        return self._cached(("entries",), lambda: self.element.find_elements(By.TAG_NAME, "li"))
+
+    def add_button(self, entry: WebElement) -> WebElement:
+        return self._cached(("add", entry.id), lambda: self._buttons(entry)[0])
+
+    def remove_button(self, entry: WebElement) -> WebElement:
+        return self._cached(("remove", entry.id), lambda: self._buttons(entry)[1])
+
+    def _buttons(self, entry: WebElement) -> list[WebElement]:
+        return self._cached(("buttons", entry.id), lambda: entry.find_elements(By.CSS_SELECTOR, "div.unit-controller button"))
+
+    def add(self, entry: WebElement):
+        relocate: Callable[[], WebElement] = self._relocate(entry)
+        self._retrying(lambda: self.add_button(relocate()).click())
+        self.invalidate()
+
+    def remove(self, entry: WebElement):
+        relocate: Callable[[], WebElement] = self._relocate(entry)
+        self._retrying(lambda: self.remove_button(relocate()).click())
+        self.invalidate()
+        invalidate_pages(self.driver, PromoDialog)
+
+
+class PromoDialog(PageObject):
+    @property
+    def element(self) -> WebElement:
+        return self._cached(("promo",), lambda: self.driver.find_element(By.CLASS_NAME, "promo"))
+
+    @property
+    def accept_button(self) -> WebElement:
+        return self._cached(("accept",), lambda: self.element.find_element(By.CSS_SELECTOR, "div.buttons button.yes"))
+
+    @property
+    def discard_button(self) -> WebElement:
+        return self._cached(("discard",), lambda: self.element.find_elements(By.CSS_SELECTOR, "div.buttons button")[1])
+
+    def accept(self):
+        self._retrying(lambda: self.accept_button.click())
+        self.invalidate()
+        invalidate_pages(self.driver, CartPreview)
+
+    def discard(self):
+        self._retrying(lambda: self.discard_button.click())
+        self.invalidate()
+
+
+class PaymentModal(PageObject):
+    @property
+    def element(self) -> WebElement:
+        return self._cached(("modal",), lambda: self.driver.find_element(By.CSS_SELECTOR, "div.modal-content"))
+
+    @property
+    def name_input(self) -> WebElement:
+        return self._cached(("name",), lambda: self.element.find_element(By.CSS_SELECTOR, "input#name"))
+
+    @property
+    def email_input(self) -> WebElement:
+        return self._cached(("email",), lambda: self.element.find_element(By.CSS_SELECTOR, "input#email"))
+
+    @property
+    def promotion_checkbox(self) -> WebElement:
+        return self._cached(("promotion",), lambda: self.element.find_element(By.CSS_SELECTOR, "input#promotion"))
+
+    @property
+    def submit_button(self) -> WebElement:
+        return self._cached(("submit",), lambda: self.element.find_element(By.CSS_SELECTOR, "button#submit-payment"))
+
+    def submit(self):
+        self._retrying(lambda: self.submit_button.click())
+        invalidate_pages(self.driver, CartPreview, PromoDialog)
+
+
+class CartPage(PageObject):
+    @property
+    def entries(self) -> list[WebElement]:
+        return self._cached(("entries",), lambda: self.driver.find_elements(By.CSS_SELECTOR, "ul:not(.cart-preview) li.list-item"))
+
+    @property
+    def pay_button(self) -> WebElement:
+        return self._cached(("pay_button",), lambda: self.driver.find_element(By.CSS_SELECTOR, "div.pay-container button.pay"))
+
+    def add_button(self, entry: WebElement) -> WebElement:
+        return self._cached(("add", entry.id), lambda: self._buttons(entry)[0])
+
+    def remove_button(self, entry: WebElement) -> WebElement:
+        return self._cached(("remove", entry.id), lambda: self._buttons(entry)[1])
+
+    def remove_entry_button(self, entry: WebElement) -> WebElement:
+        return self._cached(("delete", entry.id), lambda: entry.find_element(By.CSS_SELECTOR, "div button[class='delete']"))
+
+    def _buttons(self, entry: WebElement) -> list[WebElement]:
+        return self._cached(("buttons", entry.id), lambda: entry.find_elements(By.CSS_SELECTOR, "div div.unit-controller button"))
+
+    # Changing the amount keeps the row, so only removals drop the cached rows
+    def add(self, entry: WebElement):
+        relocate: Callable[[], WebElement] = self._relocate(entry)
+        self._retrying(lambda: self.add_button(relocate()).click())
+
+    def remove(self, entry: WebElement):
+        relocate: Callable[[], WebElement] = self._relocate(entry)
+        self._retrying(lambda: self.remove_button(relocate()).click())
+        self._elements.pop(("entries",), None)
+
+    def remove_entry(self, entry: WebElement):
+        relocate: Callable[[], WebElement] = self._relocate(entry)
+        self._retrying(lambda: self.remove_entry_button(relocate()).click())
+        self._elements.pop(("entries",), None)
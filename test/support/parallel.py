@@ -0,0 +1,132 @@
+import statistics
+import time
+
+import pytest
+
+DURATIONS_CACHE_KEY = "coffeecart/durations"
+WORKER_OUTPUT_KEY = "coffeecart_worker_timing"
+
+# Estimate used for tests that were never run before
+EXPENSIVE_SETUP_ESTIMATE = 10.0
+
+
+def worker_id(config: pytest.Config) -> str:
+    worker_input: dict = getattr(config, "workerinput", {})
+
+    return worker_input.get("workerid", "master")
+
+
+def is_worker(config: pytest.Config) -> bool:
+    return hasattr(config, "workerinput")
+
+
+def is_parallel_run(config: pytest.Config) -> bool:
+    return is_worker(config) or bool(config.getoption("numprocesses", None))
+
+
+def estimate_durations(items: list[pytest.Item], known_durations: dict[str, float]) -> dict[str, float]:
+    default_estimate: float = statistics.median(known_durations.values()) if known_durations else 1.0
+    estimates: dict[str, float] = {}
+
+    for item in items:
+        if item.nodeid in known_durations:
+            estimates[item.nodeid] = known_durations[item.nodeid]
+        elif item.get_closest_marker("expensive_setup"):
+            estimates[item.nodeid] = max(default_estimate, EXPENSIVE_SETUP_ESTIMATE)
+        else:
+            estimates[item.nodeid] = default_estimate
+
+    return estimates
+
+
+def order_longest_first(items: list[pytest.Item], known_durations: dict[str, float]):
+    estimates: dict[str, float] = estimate_durations(items, known_durations)
+
+    # Longest processing time first keeps the expensive setups spread over the workers,
+    # the sort is stable and deterministic, so every worker collects the same order
+    items.sort(key=lambda item: estimates[item.nodeid], reverse=True)
+
+
+class DurationRecorder:
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        self.durations: dict[str, float] = {}
+        # Without the cache plugin (-p no:cacheprovider) the durations of earlier runs are unknown
+        self.cache: pytest.Cache | None = getattr(config, "cache", None)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config: pytest.Config, items: list[pytest.Item]):
+        if is_parallel_run(config):
+            order_longest_first(items, self.cache.get(DURATIONS_CACHE_KEY, {}) if self.cache is not None else {})
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        if is_worker(self.config) or not self.durations or self.cache is None:
+            return
+
+        known_durations: dict[str, float] = self.cache.get(DURATIONS_CACHE_KEY, {})
+        known_durations.update(self.durations)
+        self.cache.set(DURATIONS_CACHE_KEY, known_durations)
+
+
+class WorkerTiming:
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        self.session_start = time.perf_counter()
+        self.busy_time = 0.0
+        self.tests = 0
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item):
+        start = time.perf_counter()
+
+        yield
+
+        self.busy_time += time.perf_counter() - start
+        self.tests += 1
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        wall_time = time.perf_counter() - self.session_start
+
+        self.config.workeroutput[WORKER_OUTPUT_KEY] = {
+            "wall_time": wall_time,
+            "busy_time": self.busy_time,
+            "idle_time": max(wall_time - self.busy_time, 0.0),
+            "tests": self.tests,
+        }
+
+
+class ParallelSummary:
+    def __init__(self):
+        self.session_start = time.perf_counter()
+        self.workers: dict[str, dict] = {}
+
+    def pytest_testnodedown(self, node, error):
+        timing: dict | None = node.workeroutput.get(WORKER_OUTPUT_KEY)
+
+        if timing is not None:
+            self.workers[node.gateway.id] = timing
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.workers:
+            return
+
+        session_wall_time = time.perf_counter() - self.session_start
+        total_busy_time = sum(timing["busy_time"] for timing in self.workers.values())
+
+        terminalreporter.section("worker timing")
+
+        for worker, timing in sorted(self.workers.items()):
+            terminalreporter.write_line(
+                f"{worker}: {timing['tests']} tests, "
+                f"wall {timing['wall_time']:.2f}s, "
+                f"busy {timing['busy_time']:.2f}s, "
+                f"idle {timing['idle_time']:.2f}s"
+            )
+
+        terminalreporter.write_line(
+            f"session wall {session_wall_time:.2f}s, "
+            f"speedup {total_busy_time / session_wall_time:.2f}x over {len(self.workers)} workers"
+        )
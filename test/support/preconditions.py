@@ -0,0 +1,198 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+from weakref import WeakKeyDictionary
+
+import pytest
+from selenium.common import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.browser_pool import BrowserPool, reset_browser
+from support.pages import invalidate_pages
+from support.parallel import is_parallel_run
+
+MUTATING_TESTS_CACHE_KEY = "coffeecart/mutating_tests"
+
+# Hash of the URL, the rendered application, the form values and the visible dialogs, any change made by a test
+# changes it. Typed values and checkboxes are properties, they do not show up in the markup.
+FINGERPRINT_SCRIPT = """
+const fields = Array.from(document.querySelectorAll("input, textarea, select")).map((field) =>
+    `${field.id || field.name}=${field.type === "checkbox" || field.type === "radio" ? field.checked : field.value}`);
+const dialogs = Array.from(document.querySelectorAll(".modal, .promo")).map((dialog) =>
+    `${dialog.className}:${dialog.getClientRects().length > 0 && getComputedStyle(dialog).visibility !== "hidden"}`);
+const text = [window.location.href, document.getElementById("app").innerHTML, ...fields, ...dialogs].join("\\n");
+let hash = 5381;
+
+for (let index = 0; index < text.length; index++) {
+    hash = ((hash * 33) ^ text.charCodeAt(index)) >>> 0;
+}
+
+return hash;
+"""
+
+# Tests which changed a shared prepared state in an earlier run, they always build their own
+mutating_tests: set[str] = set()
+
+# The test running after each test, set by the scheduler before the test starts
+next_item_key = pytest.StashKey[pytest.Item | None]()
+
+
+def fingerprint(driver: WebDriver) -> int:
+    return driver.execute_script(FINGERPRINT_SCRIPT)
+
+
+def precondition_of(item: pytest.Item) -> str | None:
+    marker = item.get_closest_marker("precondition")
+
+    return marker.args[0] if marker is not None else None
+
+
+def can_reuse_state(item: pytest.Item) -> bool:
+    return (
+        precondition_of(item) is not None
+        and item.get_closest_marker("read_only") is not None
+        and item.nodeid not in mutating_tests
+    )
+
+
+# Whether no test reusing the prepared state of the item's precondition runs right after it
+def is_last_reuse(item: pytest.Item) -> bool:
+    next_item: pytest.Item | None = item.stash.get(next_item_key, None)
+
+    return next_item is None or not can_reuse_state(next_item) or precondition_of(next_item) != precondition_of(item)
+
+
+@dataclass
+class PreparedState:
+    driver: WebDriver
+    # None until the precondition is built in the browser
+    fingerprint: int | None = None
+
+
+_prepared: WeakKeyDictionary[WebDriver, PreparedState] = WeakKeyDictionary()
+
+builds = 0
+reuses = 0
+
+
+def is_prepared(driver: WebDriver) -> bool:
+    state: PreparedState | None = _prepared.get(driver)
+
+    return state is not None and state.fingerprint is not None
+
+
+def prepare(build: Callable, driver: WebDriver, *args):
+    global builds, reuses
+
+    if is_prepared(driver):
+        reuses += 1
+        return
+
+    build(driver, *args)
+    builds += 1
+
+    state: PreparedState | None = _prepared.get(driver)
+
+    if state is not None:
+        state.fingerprint = fingerprint(driver)
+
+
+class PreparedStates:
+    def __init__(self, pool: BrowserPool):
+        self.pool = pool
+        self._states: dict[str, PreparedState] = {}
+
+    @contextmanager
+    def lease(self, precondition: str, nodeid: str, last: bool = False) -> Iterator[WebDriver]:
+        state: PreparedState | None = self._states.get(precondition)
+
+        if state is None:
+            state = PreparedState(self.pool.acquire())
+            self._states[precondition] = state
+            _prepared[state.driver] = state
+
+        try:
+            yield state.driver
+        finally:
+            self._check(precondition, state, nodeid)
+
+            # The tests of a precondition run one after another, so its browser goes back to the pool after the last
+            if last and self._states.get(precondition) is state:
+                self._release(precondition)
+
+    def _check(self, precondition: str, state: PreparedState, nodeid: str):
+        invalidate_pages(state.driver)
+
+        try:
+            if state.fingerprint is None or fingerprint(state.driver) == state.fingerprint:
+                return
+
+            # The test changed the shared state, it is built again for the next test
+            mutating_tests.add(nodeid)
+            state.fingerprint = None
+            reset_browser(state.driver)
+        except WebDriverException:
+            self._release(precondition)
+
+    def _release(self, precondition: str):
+        state: PreparedState = self._states.pop(precondition)
+        # The pooled browser is handed out to other tests, which must build their preconditions again
+        _prepared.pop(state.driver, None)
+        self.pool.release(state.driver)
+
+    def close(self):
+        for precondition in list(self._states):
+            self._release(precondition)
+
+
+class PreconditionScheduler:
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        # The cache plugin may be disabled (-p no:cacheprovider), the mutating tests are then only known for this run
+        self.cache: pytest.Cache | None = getattr(config, "cache", None)
+
+        if self.cache is not None:
+            mutating_tests.update(self.cache.get(MUTATING_TESTS_CACHE_KEY, []))
+
+    def pytest_collection_modifyitems(self, config: pytest.Config, items: list[pytest.Item]):
+        if is_parallel_run(config):
+            # Workers order their own tests, the tests reusing one state are kept on one worker with --dist loadgroup
+            for item in items:
+                if can_reuse_state(item):
+                    item.add_marker(pytest.mark.xdist_group(precondition_of(item)))
+
+            return
+
+        first_positions: dict[tuple, int] = {}
+        keys: dict[str, tuple] = {}
+
+        for position, item in enumerate(items):
+            precondition: str | None = precondition_of(item)
+            group: tuple = (item.nodeid.split("::")[0], precondition) if precondition else (item.nodeid,)
+            first_position: int = first_positions.setdefault(group, position)
+
+            # Tests sharing a precondition run together, the ones reusing the prepared state first
+            keys[item.nodeid] = (first_position, not can_reuse_state(item), position)
+
+        items.sort(key=lambda item: keys[item.nodeid])
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item: pytest.Item, nextitem: pytest.Item | None):
+        # Under xdist this is the next test of the worker's own schedule
+        item.stash[next_item_key] = nextitem
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        if self.cache is None:
+            return
+
+        known: set[str] = set(self.cache.get(MUTATING_TESTS_CACHE_KEY, []))
+
+        if not mutating_tests <= known:
+            self.cache.set(MUTATING_TESTS_CACHE_KEY, sorted(known | mutating_tests))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if builds == 0 and reuses == 0:
+            return
+
+        terminalreporter.section("prepared states")
+        terminalreporter.write_line(f"{builds} built, {reuses} reused, {len(mutating_tests)} tests known to mutate them")
@@ -0,0 +1,47 @@
+import re
+from dataclasses import dataclass
+
+# Every price rendered by the application, e.g. "$10.00"
+PRICE_PATTERN = re.compile(r"\$(?P<dollars>[0-9]+)\.(?P<cents>[0-9]{2})")
+# Pay button, e.g. "Total: $10.00"
+TOTAL_PATTERN = re.compile(r"Total: " + PRICE_PATTERN.pattern)
+# Unit price and amount of a cart entry, e.g. "$10.00 x 2"
+UNIT_DESCRIPTION_PATTERN = re.compile(PRICE_PATTERN.pattern + r"\s*x\s*(?P<amount>[0-9]+)")
+
+
+def _match(pattern: re.Pattern, text: str) -> re.Match:
+    match: re.Match | None = pattern.fullmatch(text.strip())
+
+    if match is None:
+        raise ValueError(f"'{text}' does not match {pattern.pattern}")
+
+    return match
+
+
+def _cents(match: re.Match) -> int:
+    return int(match["dollars"]) * 100 + int(match["cents"])
+
+
+def parse_price(text: str) -> int:
+    return _cents(_match(PRICE_PATTERN, text))
+
+
+def parse_total(text: str) -> int:
+    return _cents(_match(TOTAL_PATTERN, text))
+
+
+def parse_unit_description(text: str) -> tuple[int, int]:
+    match: re.Match = _match(UNIT_DESCRIPTION_PATTERN, text)
+
+    return _cents(match), int(match["amount"])
+
+
+@dataclass(frozen=True)
+class PriceCatalogue:
+    prices: dict[str, int]
+
+    def __getitem__(self, name: str) -> int:
+        return self.prices[name]
+
+    def total(self, items: dict[str, int]) -> int:
+        return sum(self.prices[name] * count for name, count in items.items())
@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+HOVER_ATTRIBUTE = "data-coffeecart-hover"
+
+# Copies every :hover rule with the pseudo-class replaced by an attribute, so the hover state of all elements
+# can be switched on and off from the script. Transitions are disabled, the styles are read in their final state.
+HOVER_SAMPLE_SCRIPT = """
+const elements = arguments[0];
+const properties = arguments[1];
+const attribute = arguments[2];
+
+function read(element) {
+    const style = window.getComputedStyle(element);
+
+    return Object.fromEntries(properties.map((property) => [property, style.getPropertyValue(property)]));
+}
+
+const rules = ["*, *::before, *::after { transition: none !important; animation: none !important; }"];
+
+function collect(cssRules) {
+    for (const rule of cssRules) {
+        if (rule.selectorText !== undefined) {
+            if (rule.selectorText.includes(":hover")) {
+                rules.push(`${rule.selectorText.split(":hover").join(`[${attribute}]`)} { ${rule.style.cssText} }`);
+            }
+        } else if (rule.cssRules !== undefined && (rule.media === undefined || window.matchMedia(rule.media.mediaText).matches)) {
+            collect(rule.cssRules);
+        }
+    }
+}
+
+for (const sheet of document.styleSheets) {
+    try {
+        collect(sheet.cssRules);
+    } catch (error) {
+        // Rules of cross-origin stylesheets cannot be read
+    }
+}
+
+const forcedStyle = document.createElement("style");
+forcedStyle.textContent = rules.join("\\n");
+document.head.appendChild(forcedStyle);
+
+const before = elements.map(read);
+
+elements.forEach((element) => element.setAttribute(attribute, ""));
+const hover = elements.map(read);
+
+elements.forEach((element) => element.removeAttribute(attribute));
+const after = elements.map(read);
+
+forcedStyle.remove();
+
+return elements.map((element, index) => ({before: before[index], hover: hover[index], after: after[index]}));
+"""
+
+
+@dataclass(frozen=True)
+class HoverSample:
+    before: dict[str, str]
+    hover: dict[str, str]
+    after: dict[str, str]
+
+
+def sample_hover_styles(driver: WebDriver, elements: list[WebElement], properties: list[str]) -> list[HoverSample]:
+    raw_samples: list[dict] = driver.execute_script(HOVER_SAMPLE_SCRIPT, elements, properties, HOVER_ATTRIBUTE)
+
+    return [HoverSample(**raw_sample) for raw_sample in raw_samples]
@@ -0,0 +1,189 @@
+import argparse
+import json
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+TEST_DIRECTORY = Path(__file__).parent.parent
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE = TEST_DIRECTORY / "benchmarks" / "baseline.json"
+
+TEST_MODULES = ["test_menu.py", "test_cart.py", "test_navigation.py"]
+
+# Commands booked by hand for the browser and geckodriver startup
+STARTUP_COMMANDS = ["launchBrowser", "startGeckodriver"]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered: list[float] = sorted(values)
+
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run_suite(report_path: Path, pytest_args: list[str]) -> tuple[float, int]:
+    start = time.perf_counter()
+
+    completed: subprocess.CompletedProcess = subprocess.run(
+        [
+            sys.executable, "-m", "pytest", "-q",
+            "--coffee-cart-target=local", f"--timing-report={report_path}",
+            *TEST_MODULES, *pytest_args,
+        ],
+        cwd=TEST_DIRECTORY,
+        check=False,
+    )
+
+    return time.perf_counter() - start, completed.returncode
+
+
+def timed_run(name: str, report_path: Path, pytest_args: list[str]) -> float:
+    wall_time, status = run_suite(report_path, pytest_args)
+
+    # Failing or interrupted runs finish early, they would pass as a speed-up or end up in the baseline
+    if status != 0:
+        sys.exit(f"{name}: pytest exited with status {status}, the run is not timed")
+
+    return wall_time
+
+
+def summarise(wall_times: list[float], reports: list[dict]) -> dict:
+    test_durations: dict[str, list[float]] = {}
+
+    for report in reports:
+        for nodeid, test in report["tests"].items():
+            if not nodeid.startswith("<"):
+                test_durations.setdefault(nodeid, []).append(test["duration"])
+
+    startup_times: list[float] = [
+        report["commands"].get(command, {}).get("total", 0.0) for report in reports for command in STARTUP_COMMANDS
+    ]
+    command_counts: list[int] = [
+        sum(stats["count"] for name, stats in report["commands"].items() if name not in STARTUP_COMMANDS)
+        for report in reports
+    ]
+
+    return {
+        "wall_time": {"p50": statistics.median(wall_times), "p95": percentile(wall_times, 0.95)},
+        "startup_time": sum(startup_times) / len(reports),
+        "commands": statistics.median(command_counts),
+        "tests": {
+            nodeid: {"p50": statistics.median(durations), "p95": percentile(durations, 0.95)}
+            for nodeid, durations in sorted(test_durations.items())
+        },
+    }
+
+
+def find_regressions(summary: dict, baseline: dict, threshold: float) -> list[str]:
+    checks: list[tuple[str, float, float]] = [
+        ("wall time p50", summary["wall_time"]["p50"], baseline["wall_time"]["p50"]),
+        ("browser startup", summary["startup_time"], baseline["startup_time"]),
+        ("WebDriver commands", summary["commands"], baseline["commands"]),
+    ]
+
+    for nodeid, test in summary["tests"].items():
+        if nodeid in baseline["tests"]:
+            checks.append((f"{nodeid} p95", test["p95"], baseline["tests"][nodeid]["p95"]))
+
+    return [
+        f"{name}: {current:.3f} against {previous:.3f} (+{(current / previous - 1) * 100:.0f}%)"
+        for name, current, previous in checks
+        if previous > 0 and current > previous * (1 + threshold)
+    ]
+
+
+def compare_variant(runs: int, pytest_args: list[str], variant_args: list[str]):
+    wall_times: dict[str, list[float]] = {"default": [], "variant": []}
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The runs alternate, so a slower machine state does not favour one of the modes
+        for run in range(runs):
+            for mode, extra_args in [("default", []), ("variant", variant_args)]:
+                report_path = Path(directory) / f"{mode}-{run}.json"
+                wall_times[mode].append(timed_run(f"{mode} run {run + 1}", report_path, [*pytest_args, *extra_args]))
+
+    default: float = statistics.median(wall_times["default"])
+    variant: float = statistics.median(wall_times["variant"])
+
+    print(
+        f"wall p50 {default:.2f}s without and {variant:.2f}s with {' '.join(variant_args)} "
+        f"({(variant / default - 1) * 100:+.0f}%) over {runs} runs"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the suite against the local copy of the application")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 is 20%%")
+    parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+    parser.add_argument(
+        "--variant",
+        default=None,
+        help="pytest arguments of a run mode (e.g. '--transport=bidi'), the suite time is compared with and without them",
+    )
+    parser.add_argument("pytest_args", nargs="*")
+    args = parser.parse_args()
+
+    if args.variant is not None:
+        compare_variant(args.runs, args.pytest_args, shlex.split(args.variant))
+        return
+
+    # A missing baseline is an error, a gate which records its own baseline on a fresh checkout never fails
+    if not args.update and not args.baseline.exists():
+        sys.exit(f"{args.baseline} does not exist, record a baseline with --update and commit it")
+
+    wall_times: list[float] = []
+    reports: list[dict] = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for run in range(args.runs):
+            report_path = Path(directory) / f"run-{run}.json"
+            wall_times.append(timed_run(f"run {run + 1}", report_path, args.pytest_args))
+
+            if not report_path.exists():
+                sys.exit(f"run {run + 1} did not write a timing report")
+
+            reports.append(json.loads(report_path.read_text()))
+
+    summary: dict = summarise(wall_times, reports)
+
+    print(
+        f"wall p50 {summary['wall_time']['p50']:.2f}s, p95 {summary['wall_time']['p95']:.2f}s, "
+        f"startup {summary['startup_time']:.2f}s, {summary['commands']:.0f} commands over {args.runs} runs"
+    )
+
+    if args.update:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "version": BASELINE_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "runs": args.runs,
+            **summary,
+        }, indent=2))
+        print(f"baseline written to {args.baseline}")
+        return
+
+    baseline: dict = json.loads(args.baseline.read_text())
+
+    if baseline.get("version") != BASELINE_VERSION:
+        sys.exit(f"{args.baseline} has version {baseline.get('version')}, expected {BASELINE_VERSION}, run with --update")
+
+    regressions: list[str] = find_regressions(summary, baseline, args.threshold)
+
+    for regression in regressions:
+        print(f"regression: {regression}")
+
+    if regressions:
+        sys.exit(1)
+
+    print(f"no regression beyond {args.threshold * 100:.0f}% of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
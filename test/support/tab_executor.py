@@ -0,0 +1,34 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.browser_pool import BrowserPool
+from support.pages import invalidate_pages
+
+
+class TabExecutor:
+    def __init__(self, pool: BrowserPool):
+        self.pool = pool
+        self.driver: WebDriver | None = None
+
+        # The focused tab is global to the WebDriver session, so one test at a time drives the shared browser
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self) -> Iterator[WebDriver]:
+        with self._lock:
+            if self.driver is None:
+                self.driver = self.pool.acquire()
+
+            # Read-only tests are not followed by a reset, the tabs they opened stay warm for the next test
+            yield self.driver
+
+            invalidate_pages(self.driver)
+
+    def close(self):
+        with self._lock:
+            if self.driver is not None:
+                self.pool.release(self.driver)
+                self.driver = None
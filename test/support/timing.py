@@ -0,0 +1,208 @@
+import functools
+import json
+import time
+from pathlib import Path
+from typing import Callable, TypeVar
+
+import pytest
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.parallel import is_worker
+
+T = TypeVar("T")
+
+WORKER_OUTPUT_KEY = "coffeecart_command_timing"
+
+# Commands issued outside of a test (e.g. while resetting a pooled browser) are booked here
+NO_TEST = "<session>"
+NO_HELPER = "<direct>"
+
+
+def new_stats() -> dict:
+    return {"count": 0, "total": 0.0, "max": 0.0}
+
+
+def add_to_stats(stats: dict, duration: float):
+    stats["count"] += 1
+    stats["total"] += duration
+    stats["max"] = max(stats["max"], duration)
+
+
+def merge_stats(target: dict, source: dict):
+    target["count"] += source["count"]
+    target["total"] += source["total"]
+    target["max"] = max(target["max"], source["max"])
+
+
+class TimingLog:
+    def __init__(self):
+        self.current_test = NO_TEST
+        self.helper_stack: list[str] = []
+
+        self.tests: dict[str, dict] = {}
+        self.commands: dict[str, dict] = {}
+        self.helpers: dict[str, dict] = {}
+
+    def _test(self, nodeid: str) -> dict:
+        return self.tests.setdefault(nodeid, {"duration": 0.0, "commands": new_stats(), "helpers": {}})
+
+    def record_command(self, command: str, locator: str | None, duration: float):
+        key: str = f"{command} {locator}" if locator else command
+        add_to_stats(self.commands.setdefault(key, new_stats()), duration)
+
+        test: dict = self._test(self.current_test)
+        add_to_stats(test["commands"], duration)
+
+        helper: str = self.helper_stack[-1] if self.helper_stack else NO_HELPER
+        test["helpers"][helper] = test["helpers"].get(helper, 0.0) + duration
+
+    def record_helper(self, helper: str, duration: float):
+        add_to_stats(self.helpers.setdefault(helper, new_stats()), duration)
+
+    def record_test(self, nodeid: str, duration: float):
+        self._test(nodeid)["duration"] += duration
+
+    def as_dict(self) -> dict:
+        return {"tests": self.tests, "commands": self.commands, "helpers": self.helpers}
+
+    def merge(self, data: dict):
+        for nodeid, test in data["tests"].items():
+            merged: dict = self._test(nodeid)
+            merged["duration"] += test["duration"]
+            merge_stats(merged["commands"], test["commands"])
+
+            for helper, duration in test["helpers"].items():
+                merged["helpers"][helper] = merged["helpers"].get(helper, 0.0) + duration
+
+        for stats, source in [(self.commands, data["commands"]), (self.helpers, data["helpers"])]:
+            for key, entry in source.items():
+                merge_stats(stats.setdefault(key, new_stats()), entry)
+
+
+timing_log = TimingLog()
+
+
+def describe_locator(params: dict) -> str | None:
+    if "using" in params and "value" in params:
+        return f"{params['using']}={params['value']}"
+
+    return None
+
+
+def instrument(driver: WebDriver):
+    executor = driver.command_executor
+    execute: Callable = executor.execute
+
+    @functools.wraps(execute)
+    def timed_execute(command: str, params: dict):
+        start = time.perf_counter()
+
+        try:
+            return execute(command, params)
+        finally:
+            timing_log.record_command(command, describe_locator(params or {}), time.perf_counter() - start)
+
+    executor.execute = timed_execute
+
+
+def timed_helper(helper: Callable[..., T]) -> Callable[..., T]:
+    @functools.wraps(helper)
+    def wrapper(*args, **kwargs) -> T:
+        timing_log.helper_stack.append(helper.__name__)
+        start = time.perf_counter()
+
+        try:
+            return helper(*args, **kwargs)
+        finally:
+            timing_log.record_helper(helper.__name__, time.perf_counter() - start)
+            timing_log.helper_stack.pop()
+
+    return wrapper
+
+
+def slowest(stats: dict[str, dict], top: int) -> list[tuple[str, dict]]:
+    return sorted(stats.items(), key=lambda item: item[1]["total"], reverse=True)[:top]
+
+
+class TimingReport:
+    def __init__(self, config: pytest.Config):
+        self.config = config
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item):
+        timing_log.current_test = item.nodeid
+        start = time.perf_counter()
+
+        yield
+
+        timing_log.record_test(item.nodeid, time.perf_counter() - start)
+        timing_log.current_test = NO_TEST
+
+    def pytest_testnodedown(self, node, error):
+        data: dict | None = node.workeroutput.get(WORKER_OUTPUT_KEY)
+
+        if data is not None:
+            timing_log.merge(data)
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        if is_worker(self.config):
+            self.config.workeroutput[WORKER_OUTPUT_KEY] = timing_log.as_dict()
+            return
+
+        if not timing_log.tests:
+            return
+
+        report_path: Path | None = self.report_path()
+
+        if report_path is None:
+            return
+
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(timing_log.as_dict(), indent=2))
+
+    def report_path(self) -> Path | None:
+        option: str | None = self.config.getoption("timing_report")
+
+        if option:
+            return Path(option)
+
+        # Without the cache plugin (-p no:cacheprovider) the report is only written to an explicit path
+        cache: pytest.Cache | None = getattr(self.config, "cache", None)
+
+        if cache is None:
+            return None
+
+        return cache.mkdir("coffeecart-timing") / "report.json"
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if is_worker(self.config) or not timing_log.tests:
+            return
+
+        top: int = self.config.getoption("timing_top")
+
+        terminalreporter.section(f"slowest operations (top {top})")
+
+        terminalreporter.write_line("tests:")
+        tests: list[tuple[str, dict]] = sorted(timing_log.tests.items(), key=lambda item: item[1]["duration"], reverse=True)
+
+        for nodeid, test in tests[:top]:
+            commands: dict = test["commands"]
+            terminalreporter.write_line(
+                f"  {test['duration']:.2f}s {nodeid} "
+                f"({commands['count']} commands, {commands['total']:.2f}s in WebDriver)"
+            )
+
+        for title, stats in [("commands", timing_log.commands), ("helpers", timing_log.helpers)]:
+            terminalreporter.write_line(f"{title}:")
+
+            for name, entry in slowest(stats, top):
+                terminalreporter.write_line(
+                    f"  {entry['total']:.2f}s {name} "
+                    f"({entry['count']} calls, mean {entry['total'] / entry['count'] * 1000:.1f}ms, "
+                    f"max {entry['max'] * 1000:.1f}ms)"
+                )
+
+        report_path: Path | None = self.report_path()
+
+        if report_path is not None:
+            terminalreporter.write_line(f"full report: {report_path}")
@@ -0,0 +1,131 @@
+import functools
+import math
+import time
+from typing import Any, Callable
+from weakref import WeakKeyDictionary
+
+from selenium.common import WebDriverException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.timing import timing_log
+
+CLASSIC = "classic"
+BIDI = "bidi"
+
+TRANSPORTS = [CLASSIC, BIDI]
+
+# Browsing context of the focused tab, so that a BiDi call does not need a classic request to find it
+_bidi_contexts: WeakKeyDictionary[WebDriver, str] = WeakKeyDictionary()
+
+
+def use_bidi(driver: WebDriver):
+    _bidi_contexts[driver] = driver.current_window_handle
+
+    executor = driver.command_executor
+    execute: Callable = executor.execute
+
+    @functools.wraps(execute)
+    def tracking_execute(command: str, params: dict):
+        response = execute(command, params)
+
+        if command == Command.SWITCH_TO_WINDOW:
+            _bidi_contexts[driver] = params["handle"]
+
+        return response
+
+    executor.execute = tracking_execute
+
+
+def uses_bidi(driver: WebDriver) -> bool:
+    return driver in _bidi_contexts
+
+
+def run_script(driver: WebDriver, script: str, *args) -> Any:
+    # Only scripts returning plain values go through here, element references are not shared between the transports
+    if not uses_bidi(driver):
+        return driver.execute_script(script, *args)
+
+    start = time.perf_counter()
+
+    try:
+        return call_function(driver, script, *args)
+    finally:
+        timing_log.record_command("script.callFunction", None, time.perf_counter() - start)
+
+
+def call_function(driver: WebDriver, script: str, *args) -> Any:
+    # Selenium 4.34 only exposes script.callFunction as _call_function, it returns an EvaluateResult
+    result = driver.script._call_function(
+        # Scripts are written for execute_script, so the body is wrapped in a function that sees the same arguments
+        function_declaration=f"function () {{ {script} }}",
+        await_promise=False,
+        target={"context": _bidi_contexts[driver]},
+        arguments=[serialize(arg) for arg in args],
+        result_ownership="none",
+    )
+
+    if result.exception_details is not None:
+        raise WebDriverException(result.exception_details["text"])
+
+    return deserialize(result.result)
+
+
+def add_preload_script(driver: WebDriver, function_declaration: str) -> str:
+    # Selenium 4.34 only exposes script.addPreloadScript as _add_preload_script, the script is limited to the focused tab
+    return driver.script._add_preload_script(function_declaration, contexts=[_bidi_contexts[driver]])
+
+
+def remove_preload_script(driver: WebDriver, script_id: str):
+    driver.script._remove_preload_script(script_id)
+
+
+def serialize(value: Any) -> dict:
+    if value is None:
+        return {"type": "null"}
+
+    if isinstance(value, bool):
+        return {"type": "boolean", "value": value}
+
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            return {"type": "number", "value": str(value).replace("inf", "Infinity").replace("nan", "NaN")}
+
+        return {"type": "number", "value": value}
+
+    if isinstance(value, str):
+        return {"type": "string", "value": value}
+
+    if isinstance(value, (list, tuple)):
+        return {"type": "array", "value": [serialize(item) for item in value]}
+
+    if isinstance(value, dict):
+        return {"type": "object", "value": [[str(key), serialize(item)] for key, item in value.items()]}
+
+    raise TypeError(f"{type(value).__name__} cannot be passed to a script over BiDi")
+
+
+def deserialize(remote_value: dict) -> Any:
+    value_type: str = remote_value["type"]
+
+    if value_type in ("undefined", "null"):
+        return None
+
+    if value_type in ("string", "boolean"):
+        return remote_value["value"]
+
+    if value_type == "number":
+        value = remote_value["value"]
+
+        if isinstance(value, str):
+            return float(value.replace("Infinity", "inf"))
+
+        return value
+
+    if value_type == "array":
+        return [deserialize(item) for item in remote_value.get("value", [])]
+
+    if value_type == "object":
+        return {key: deserialize(item) for key, item in remote_value.get("value", [])}
+
+    raise TypeError(f"A {value_type} cannot be returned over BiDi, use execute_script for element references")
@@ -0,0 +1,95 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from support.browser_pool import BrowserPool
+from support.geckodriver import GeckodriverManager
+from support.local_app import LocalCoffeeCart
+from support.menu_snapshot import MENU_ENTRY_SELECTOR
+from support.pages import open_page
+from support.transport import TRANSPORTS, run_script
+
+TEST_DIRECTORY = Path(__file__).parent.parent
+
+# A read of every menu name and price, the kind of query the helpers send
+QUERY_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).map((entry) => entry.querySelector("h4").innerText);
+"""
+
+
+def measure_latency(services: GeckodriverManager, transport: str, base_url: str, repeats: int) -> list[float]:
+    pool = BrowserPool(services, headless=True, max_idle=1, transport=transport)
+
+    try:
+        with pool.lease() as driver:
+            open_page(driver, base_url)
+
+            # The first call opens the websocket and compiles the script
+            run_script(driver, QUERY_SCRIPT, MENU_ENTRY_SELECTOR)
+
+            latencies: list[float] = []
+
+            for _ in range(repeats):
+                start = time.perf_counter()
+                run_script(driver, QUERY_SCRIPT, MENU_ENTRY_SELECTOR)
+                latencies.append(time.perf_counter() - start)
+
+            return latencies
+    finally:
+        pool.close()
+
+
+def measure_suite(transport: str, pytest_args: list[str]) -> float:
+    start = time.perf_counter()
+
+    completed: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", f"--transport={transport}", *pytest_args],
+        cwd=TEST_DIRECTORY,
+        check=False,
+    )
+
+    # A failing run finishes early and would look faster
+    if completed.returncode != 0:
+        sys.exit(f"{transport}: pytest exited with status {completed.returncode}, the suite is not timed")
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare classic WebDriver and WebDriver BiDi script latency")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--suite", action="store_true", help="also time a full test run with each transport")
+    parser.add_argument("pytest_args", nargs="*", default=["--coffee-cart-target=local"])
+    args = parser.parse_args()
+
+    local_app = LocalCoffeeCart()
+    local_app.start()
+    services = GeckodriverManager()
+
+    try:
+        results: dict[str, list[float]] = {
+            transport: measure_latency(services, transport, local_app.url, args.repeats) for transport in TRANSPORTS
+        }
+    finally:
+        services.close()
+        local_app.stop()
+
+    for transport, latencies in results.items():
+        latencies.sort()
+
+        print(
+            f"{transport}: median {statistics.median(latencies) * 1000:.2f}ms, "
+            f"mean {statistics.mean(latencies) * 1000:.2f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f}ms over {len(latencies)} calls"
+        )
+
+    if args.suite:
+        for transport in TRANSPORTS:
+            print(f"{transport}: suite {measure_suite(transport, args.pytest_args):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
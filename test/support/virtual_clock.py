@@ -0,0 +1,144 @@
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from support.transport import add_preload_script, remove_preload_script, run_script, uses_bidi
+
+# Replaces the timers, Date and performance.now of the page with a clock which only moves when the test advances it.
+# The real timers stay available on window.__virtualClock.real for the scripts of the suite (e.g. the DOM waits).
+CLOCK_FUNCTION = """
+function installVirtualClock() {
+    if (window.__virtualClock) {
+        return;
+    }
+
+    const RealDate = window.Date;
+    const real = {
+        setTimeout: window.setTimeout.bind(window),
+        clearTimeout: window.clearTimeout.bind(window),
+        setInterval: window.setInterval.bind(window),
+        clearInterval: window.clearInterval.bind(window),
+        requestAnimationFrame: window.requestAnimationFrame.bind(window),
+        cancelAnimationFrame: window.cancelAnimationFrame.bind(window),
+        performanceNow: performance.now.bind(performance),
+        Date: RealDate,
+    };
+    const FRAME = 16;
+    const origin = RealDate.now();
+    const timers = new Map();
+    let now = 0;
+    let nextId = 1;
+
+    function schedule(callback, delay, args, interval, frame) {
+        const id = nextId++;
+        timers.set(id, {id, callback, args, interval, frame, at: now + Math.max(0, Number(delay) || 0)});
+
+        return id;
+    }
+
+    function cancel(id) {
+        timers.delete(id);
+    }
+
+    function nextDue(target) {
+        let due = null;
+
+        for (const timer of timers.values()) {
+            if (timer.at <= target && (due === null || timer.at < due.at || (timer.at === due.at && timer.id < due.id))) {
+                due = timer;
+            }
+        }
+
+        return due;
+    }
+
+    function fire(timer) {
+        now = timer.at;
+
+        if (timer.interval === null) {
+            timers.delete(timer.id);
+        } else {
+            timer.at = now + Math.max(1, timer.interval);
+        }
+
+        if (timer.frame) {
+            timer.callback(now);
+        } else if (typeof timer.callback === "function") {
+            timer.callback(...timer.args);
+        } else {
+            window.eval(String(timer.callback));
+        }
+    }
+
+    function VirtualDate(...args) {
+        if (!new.target) {
+            return new RealDate(origin + now).toString();
+        }
+
+        return args.length === 0 ? new RealDate(origin + now) : new RealDate(...args);
+    }
+
+    VirtualDate.prototype = RealDate.prototype;
+    VirtualDate.now = () => origin + now;
+    VirtualDate.parse = RealDate.parse;
+    VirtualDate.UTC = RealDate.UTC;
+
+    window.Date = VirtualDate;
+    window.setTimeout = (callback, delay, ...args) => schedule(callback, delay, args, null, false);
+    window.setInterval = (callback, delay, ...args) => schedule(callback, delay, args, Number(delay) || 0, false);
+    window.clearTimeout = cancel;
+    window.clearInterval = cancel;
+    window.requestAnimationFrame = (callback) => schedule(callback, FRAME - (now % FRAME), [], null, true);
+    window.cancelAnimationFrame = cancel;
+    performance.now = () => now;
+
+    window.__virtualClock = {
+        real,
+        tick(milliseconds) {
+            const target = now + milliseconds;
+            let fired = 0;
+            let timer;
+
+            while ((timer = nextDue(target)) !== null) {
+                fire(timer);
+                fired++;
+            }
+
+            now = target;
+
+            return fired;
+        },
+    };
+}
+"""
+
+INSTALL_SCRIPT = f"({CLOCK_FUNCTION})();"
+
+TICK_SCRIPT = "return window.__virtualClock.tick(arguments[0]);"
+
+
+class VirtualClock:
+    def __init__(self, driver: WebDriver):
+        self.driver = driver
+        self._preload_script: str | None = None
+
+    def install(self):
+        # Timers the page scheduled before the installation keep running on the real clock
+        run_script(self.driver, INSTALL_SCRIPT)
+
+    # Installs the clock into every document loaded from now on, before the application's own scripts run.
+    # Needs the BiDi transport, without it the clock is installed into the current document only.
+    def install_before_load(self):
+        if not uses_bidi(self.driver):
+            self.install()
+            return
+
+        self._preload_script = add_preload_script(self.driver, f"() => {{ ({CLOCK_FUNCTION})(); }}")
+
+    def remove_before_load(self):
+        # Pooled browsers outlive the test, the documents they load afterwards keep the real clock
+        if self._preload_script is not None:
+            remove_preload_script(self.driver, self._preload_script)
+            self._preload_script = None
+
+    # Moves the clock forward, running every timer due on the way. Returns the number of timers run.
+    def tick(self, milliseconds: int) -> int:
+        return run_script(self.driver, TICK_SCRIPT, milliseconds)
@@ -0,0 +1,147 @@
+import time
+from dataclasses import dataclass
+
+from selenium.common import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+# Checks the condition once and then only when the DOM changes or a transition/animation ends,
+# so the wait resolves as soon as the page changes instead of on the next poll tick
+WAIT_SCRIPT = """
+const conditionName = arguments[0];
+const target = arguments[1];
+const timeout = arguments[2];
+const done = arguments[arguments.length - 1];
+// The page may run on the virtual clock, the wait itself always uses the real one
+const real = window.__virtualClock ? window.__virtualClock.real : {
+    setTimeout: window.setTimeout.bind(window),
+    clearTimeout: window.clearTimeout.bind(window),
+    performanceNow: performance.now.bind(performance),
+};
+const start = real.performanceNow();
+
+function resolve() {
+    return typeof target === "string" ? document.querySelector(target) : target;
+}
+
+function isVisible(element) {
+    if (!element || !element.isConnected || element.getClientRects().length === 0) {
+        return false;
+    }
+
+    const style = window.getComputedStyle(element);
+
+    return style.visibility !== "hidden" && parseFloat(style.opacity) > 0;
+}
+
+const conditions = {
+    present: (element) => element !== null,
+    text: (element) => element !== null && element.innerText.trim() !== "",
+    visible: (element) => isVisible(element),
+    invisible: (element) => !isVisible(element),
+};
+
+function check() {
+    try {
+        return conditions[conditionName](resolve());
+    } catch (error) {
+        return false;
+    }
+}
+
+if (check()) {
+    done({satisfied: true, elapsed: real.performanceNow() - start});
+    return;
+}
+
+let finished = false;
+const observer = new MutationObserver(onChange);
+const timer = real.setTimeout(() => finish(check()), timeout);
+
+function onChange() {
+    if (check()) {
+        finish(true);
+    }
+}
+
+function finish(satisfied) {
+    if (finished) {
+        return;
+    }
+
+    finished = true;
+    observer.disconnect();
+    real.clearTimeout(timer);
+    document.removeEventListener("transitionend", onChange, true);
+    document.removeEventListener("animationend", onChange, true);
+    done({satisfied: satisfied, elapsed: real.performanceNow() - start});
+}
+
+observer.observe(document.documentElement, {subtree: true, childList: true, attributes: true, characterData: true});
+document.addEventListener("transitionend", onChange, true);
+document.addEventListener("animationend", onChange, true);
+"""
+
+
+@dataclass(frozen=True)
+class WaitRecord:
+    condition: str
+    satisfied: bool
+    # Time measured in the page, between the start of the wait and the DOM change
+    page_time: float
+    # Time including the WebDriver round-trip
+    total_time: float
+
+
+wait_history: list[WaitRecord] = []
+
+
+class DomWait:
+    def __init__(self, driver: WebDriver, timeout: float):
+        self.driver = driver
+        self.timeout = timeout
+
+    def until(self, condition: str, target: WebElement | str) -> WaitRecord:
+        start = time.perf_counter()
+        result: dict = self.driver.execute_async_script(WAIT_SCRIPT, condition, target, self.timeout * 1000)
+
+        record = WaitRecord(
+            condition=condition,
+            satisfied=result["satisfied"],
+            page_time=result["elapsed"] / 1000,
+            total_time=time.perf_counter() - start,
+        )
+        wait_history.append(record)
+
+        if not record.satisfied:
+            raise TimeoutException(f"Condition '{condition}' was not met within {self.timeout} seconds")
+
+        return record
+
+    def until_text(self, target: WebElement | str) -> WaitRecord:
+        return self.until("text", target)
+
+    def until_visible(self, target: WebElement | str) -> WaitRecord:
+        return self.until("visible", target)
+
+    def until_invisible(self, target: WebElement | str) -> WaitRecord:
+        return self.until("invisible", target)
+
+
+class WaitSummary:
+    def pytest_terminal_summary(self, terminalreporter):
+        if not wait_history:
+            return
+
+        terminalreporter.section("dom waits")
+
+        for condition in sorted({record.condition for record in wait_history}):
+            records: list[WaitRecord] = [record for record in wait_history if record.condition == condition]
+            page_times: list[float] = [record.page_time for record in records]
+
+            terminalreporter.write_line(
+                f"{condition}: {len(records)} waits, "
+                f"mean {sum(page_times) / len(page_times) * 1000:.1f}ms, "
+                f"max {max(page_times) * 1000:.1f}ms, "
+                f"timed out {sum(not record.satisfied for record in records)}"
+            )
@@ -1,67 +1,120 @@
-from decimal import Decimal
-
 import pytest
-from selenium.webdriver import Firefox
 from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.wait import WebDriverWait
 
-MENU_URL = "https://coffee-cart.app/"
-CART_URL = "https://coffee-cart.app/cart"
+from support.cart_seeding import PROMO_ITEM_NAME, can_seed, seed_cart
+from support.cart_table import CartRow, CartTable, snapshot_cart
+from support.pages import CartPage, MenuPage, NavigationBar, PromoDialog, invalidate_pages, open_page
+from support.preconditions import prepare
+from support.prices import PriceCatalogue
+from support.timing import timed_helper
+from support.transport import run_script
+from support.waits import DomWait
+
+MENU_PATH = ""
+CART_PATH = "cart"
+
+CART_LINK_INDEX = 1
+
+# Application state shared by the read-only tests of the cart entries
+EVERY_COFFEE_IN_CART = "every_coffee_in_cart"
+
+COFFEE_NAMES = [
+    "Espresso",
+    "Espresso Macchiato",
+    "Cappuccino",
+    "Mocha",
+    "Flat White",
+    "Americano",
+    "Cafe Latte",
+    "Espresso Con Panna",
+    "Cafe Breve"
+]
+
+CART_RENDER_SCRIPT = """
+return {
+    navigation: document.querySelector("#app ul[data-v-bb7b5941]").innerHTML,
+    list: document.querySelector("div.list").innerHTML,
+    payContainer: document.querySelector("div.pay-container").innerHTML,
+};
+"""
+
+
+@timed_helper
+def go_to_cart_tab(driver: WebDriver):
+    NavigationBar.of(driver).follow(CART_LINK_INDEX)
 
 
-@pytest.fixture(scope="module")
-def driver_service():
-    driver_service = Service("/snap/bin/geckodriver")
-    return driver_service
+def test_empty_cart(driver: WebDriver, base_url: str):
+    open_page(driver, base_url + CART_PATH)
 
+    paragraph: WebElement = driver.find_element(By.CSS_SELECTOR, "div.list p")
 
-@pytest.fixture
-def driver(driver_service):
-    options = Options()
-    options.add_argument("--headless")
-    driver = Firefox(options=options, service=driver_service)
+    assert paragraph.text == "No coffee, go add some."
 
-    yield driver
 
-    driver.quit()
+@timed_helper
+def add_every_coffee_to_cart(driver: WebDriver, dom_wait: DomWait, base_url: str):
+    open_page(driver, base_url + MENU_PATH)
+    menu_page: MenuPage = MenuPage.of(driver)
 
+    for menu_entry in menu_page.entries:
+        menu_page.order(menu_entry.cup)
 
-@pytest.fixture
-def wait(driver):
-    return WebDriverWait(driver, 5)
+    go_to_cart_tab(driver)
+    dom_wait.until_visible("body")
 
 
-def go_to_cart_tab(driver: WebDriver):
-    link: WebElement = driver.find_element(By.CSS_SELECTOR, "a[href='/cart']")
-    link.click()
+@timed_helper
+def seed_every_coffee_in_cart(driver: WebDriver, base_url: str):
+    seed_cart(driver, base_url, {name: 1 for name in COFFEE_NAMES}, CART_PATH)
 
 
-def test_empty_cart(driver: WebDriver):
-    driver.get(CART_URL)
+def get_cart_render(driver: WebDriver) -> dict[str, str]:
+    return run_script(driver, CART_RENDER_SCRIPT)
 
-    paragraph: WebElement = driver.find_element(By.CSS_SELECTOR, "div.list p")
 
-    assert paragraph.text == "No coffee, go add some."
+def test_seeded_cart_renders_like_ordered_cart(driver: WebDriver, dom_wait: DomWait, base_url: str):
+    if not can_seed(base_url):
+        pytest.skip("Only the local copy of the application can be seeded")
+
+    add_every_coffee_to_cart(driver, dom_wait, base_url)
+    ordered_cart: dict[str, str] = get_cart_render(driver)
+
+    seed_every_coffee_in_cart(driver, base_url)
+    seeded_cart: dict[str, str] = get_cart_render(driver)
 
+    assert seeded_cart == ordered_cart
 
-def add_every_coffee_to_cart(driver: WebDriver, wait: WebDriverWait):
-    driver.get(MENU_URL)
-    entry_buttons: list[WebElement] = list(map(lambda element: element.find_element(By.CSS_SELECTOR, "div div.cup"), driver.find_elements(By.CSS_SELECTOR, "li[data-v-a9662a08]")))
 
-    for coffee_button in entry_buttons:
-        coffee_button.click()
+def test_seeded_promo_item_renders_like_accepted_promo(driver: WebDriver, base_url: str):
+    if not can_seed(base_url):
+        pytest.skip("Only the local copy of the application can be seeded")
 
+    open_page(driver, base_url + MENU_PATH)
+    menu_page: MenuPage = MenuPage.of(driver)
+
+    # Every coffee makes the number of items divisible by three, so the promo shows up
+    for menu_entry in menu_page.entries:
+        menu_page.order(menu_entry.cup)
+
+    PromoDialog.of(driver).accept()
     go_to_cart_tab(driver)
-    wait.until(EC.visibility_of_element_located((By.TAG_NAME,"body")))
 
+    ordered_cart: dict[str, str] = get_cart_render(driver)
+
+    seed_cart(driver, base_url, {**{name: 1 for name in COFFEE_NAMES}, PROMO_ITEM_NAME: 1}, CART_PATH)
+    seeded_cart: dict[str, str] = get_cart_render(driver)
 
-def test_list_header_in_cart(driver: WebDriver, wait:WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+    assert seeded_cart == ordered_cart
+
+
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_list_header_in_cart(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
 
     header: WebElement = driver.find_element(By.CSS_SELECTOR, "li.list-header")
     columns: list[WebElement] = header.find_elements(By.TAG_NAME, "div")
@@ -73,53 +126,64 @@ def test_list_header_in_cart(driver: WebDriver, wait:WebDriverWait):
 
 
 def get_ordered_items_entries(driver: WebDriver) -> list[WebElement]:
-    return driver.find_elements(By.CSS_SELECTOR, "ul:not(.cart-preview) li.list-item")
+    return CartPage.of(driver).entries
 
 
-def test_entries_number(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_entries_number(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
     entry_rows: list[WebElement] = get_ordered_items_entries(driver)
 
     assert len(entry_rows) == 9
 
 
-def get_entry_unit_price(entry: WebElement) -> Decimal:
-    price_span: WebElement = entry.find_element(By.CSS_SELECTOR, "div span.unit-desc")
-    price_with_amount: str = price_span.text
+# The entry's parent is the driver which located it
+def get_add_button(entry: WebElement) -> WebElement:
+    return CartPage.of(entry.parent).add_button(entry)
 
-    price_text: str = price_with_amount.split("x")[0].strip()
-    return Decimal(price_text[1:])
 
+def get_remove_button(entry: WebElement) -> WebElement:
+    return CartPage.of(entry.parent).remove_button(entry)
 
-def get_entry_amount(entry: WebElement) -> int:
-    amount_span: WebElement = entry.find_element(By.CSS_SELECTOR, "div span.unit-desc")
-    price_with_amount: str = amount_span.text
 
-    amount_text: str = price_with_amount.split("x")[1].strip()
-    return int(amount_text)
+@timed_helper
+def increase_entry(entry: WebElement):
+    CartPage.of(entry.parent).add(entry)
 
 
-def get_add_button(entry: WebElement) -> WebElement:
-    return entry.find_element(By.CSS_SELECTOR, "div div.unit-controller button")
+@timed_helper
+def decrease_entry(entry: WebElement):
+    CartPage.of(entry.parent).remove(entry)
 
 
-def get_remove_button(entry: WebElement) -> WebElement:
-    return entry.find_elements(By.CSS_SELECTOR, "div div.unit-controller button")[1]
+# The rows of a cart snapshot carry their buttons, so they are clicked without locating them again
+@timed_helper
+def increase_row(row: CartRow):
+    row.add_button.click()
 
 
-def get_entry_total_price(entry: WebElement) -> Decimal:
-    total_price_div: WebElement = entry.find_elements(By.CSS_SELECTOR, ":scope > div")[2]
-    total_price_text: str = total_price_div.text[1:]
+@timed_helper
+def decrease_row(row: CartRow):
+    row.remove_button.click()
+    invalidate_pages(row.element.parent, CartPage)
 
-    return Decimal(total_price_text)
+
+@timed_helper
+def remove_entry(entry: WebElement):
+    CartPage.of(entry.parent).remove_entry(entry)
 
 
 def get_remove_entry_button(entry: WebElement) -> WebElement:
-    return entry.find_element(By.CSS_SELECTOR, "div button[class='delete']")
+    return CartPage.of(entry.parent).remove_entry_button(entry)
 
 
-def test_entry_names_are_displayed(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_entry_names_are_displayed(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
 
     cart_entries: list[WebElement] = get_ordered_items_entries(driver)
 
@@ -127,30 +191,31 @@ def test_entry_names_are_displayed(driver: WebDriver, wait: WebDriverWait):
         assert entry.is_displayed()
 
 
-def test_unit_prices_are_non_negative(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
-
-    cart_entries: list[WebElement] = get_ordered_items_entries(driver)
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_unit_prices_are_non_negative(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
 
-    for entry in cart_entries:
-        unit_price: Decimal = get_entry_unit_price(entry)
+    for row in snapshot_cart(driver).rows:
+        assert row.unit_price >= 0
 
-        assert unit_price >= 0
 
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_entry_amount_is_positive(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
 
-def test_entry_amount_is_positive(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+    for row in snapshot_cart(driver).rows:
+        assert row.amount > 0
 
-    cart_entries: list[WebElement] = get_ordered_items_entries(driver)
 
-    for entry in cart_entries:
-        amount: int = get_entry_amount(entry)
-
-        assert amount > 0
-
-
-def test_add_buttons_are_displayed(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_add_buttons_are_displayed(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
 
     cart_entries: list[WebElement] = get_ordered_items_entries(driver)
 
@@ -160,8 +225,11 @@ def test_add_buttons_are_displayed(driver: WebDriver, wait: WebDriverWait):
         assert add_button.is_displayed()
 
 
-def test_remove_buttons_are_displayed(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_remove_buttons_are_displayed(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
 
     cart_entries: list[WebElement] = get_ordered_items_entries(driver)
 
@@ -171,71 +239,67 @@ def test_remove_buttons_are_displayed(driver: WebDriver, wait: WebDriverWait):
         assert remove_button.is_displayed()
 
 
-def test_total_entry_price_is_valid_initially(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+@pytest.mark.read_only
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_total_entry_price_is_valid_initially(driver: WebDriver, base_url: str):
+    prepare(seed_every_coffee_in_cart, driver, base_url)
 
-    cart_entries: list[WebElement] = get_ordered_items_entries(driver)
+    cart_table: CartTable = snapshot_cart(driver)
 
-    for entry in cart_entries:
-        unit_price: Decimal = get_entry_unit_price(entry)
-        total_price: Decimal = get_entry_total_price(entry)
+    for row in cart_table.rows:
+        assert row.unit_price == row.total
 
-        assert unit_price == total_price
+    assert cart_table.violations() == []
 
 
-def test_adding_coffees_changes_amount_and_total_entry_price(driver: WebDriver, wait: WebDriverWait):
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_adding_coffees_changes_amount_and_total_entry_price(driver: WebDriver, base_url: str):
     repeats = 3
 
-    add_every_coffee_to_cart(driver, wait)
-
-    cart_entries: list[WebElement] = get_ordered_items_entries(driver)
-
-    for entry in cart_entries:
-        add_button: WebElement = get_add_button(entry)
-        unit_price: Decimal = get_entry_unit_price(entry)
+    seed_every_coffee_in_cart(driver, base_url)
 
+    for initial_row in snapshot_cart(driver).rows:
         for expected_amount in range(1, repeats+1):
-            expected_price = unit_price * expected_amount
-            total_price = get_entry_total_price(entry)
-            amount = get_entry_amount(entry)
+            cart_table: CartTable = snapshot_cart(driver)
+            row: CartRow = cart_table.row(initial_row.name)
 
-            assert amount == expected_amount
-            assert total_price == expected_price
+            assert row.amount == expected_amount
+            assert row.total == initial_row.unit_price * expected_amount
+            assert cart_table.violations() == []
 
-            add_button.click()
+            increase_row(row)
 
 
-def test_removing_coffees_changes_amount_and_total_entry_price(driver: WebDriver, wait: WebDriverWait):
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_removing_coffees_changes_amount_and_total_entry_price(driver: WebDriver, base_url: str):
     repeats = 3
 
-    add_every_coffee_to_cart(driver, wait)
-
-    cart_entries: list[WebElement] = get_ordered_items_entries(driver)
-
-    for entry in cart_entries:
-        add_button: WebElement = get_add_button(entry)
+    seed_every_coffee_in_cart(driver, base_url)
 
+    for initial_row in snapshot_cart(driver).rows:
         for _ in range(repeats - 1):
-            add_button.click()
-
-        remove_button: WebElement = get_remove_button(entry)
-        unit_price: Decimal = get_entry_unit_price(entry)
+            increase_row(initial_row)
 
         for expected_amount in range(repeats, 0, -1):
-            expected_price = unit_price * expected_amount
-            total_price = get_entry_total_price(entry)
-            amount = get_entry_amount(entry)
+            cart_table: CartTable = snapshot_cart(driver)
+            row: CartRow = cart_table.row(initial_row.name)
 
-            assert amount == expected_amount
-            assert total_price == expected_price
+            assert row.amount == expected_amount
+            assert row.total == initial_row.unit_price * expected_amount
+            assert cart_table.violations() == []
 
-            remove_button.click()
+            decrease_row(row)
 
 
-def test_remove_entry_button_deletes_entire_entry(driver: WebDriver, wait: WebDriverWait):
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_remove_entry_button_deletes_entire_entry(driver: WebDriver, base_url: str):
     repeats = 2
 
-    add_every_coffee_to_cart(driver, wait)
+    seed_every_coffee_in_cart(driver, base_url)
 
     cart_entries: list[WebElement] = get_ordered_items_entries(driver)
     expected_size = len(cart_entries)
@@ -245,19 +309,18 @@ def test_remove_entry_button_deletes_entire_entry(driver: WebDriver, wait: WebDr
 
         entry: WebElement = cart_entries[0]
 
-        add_button: WebElement = get_add_button(entry)
-        remove_entry_button: WebElement = get_remove_entry_button(entry)
-
         for _ in range(repeats):
-            add_button.click()
+            increase_entry(entry)
 
-        remove_entry_button.click()
+        remove_entry(entry)
         expected_size -= 1
         cart_entries = get_ordered_items_entries(driver)
 
 
-def test_removing_single_item_removes_entire_entry(driver: WebDriver, wait: WebDriverWait):
-    add_every_coffee_to_cart(driver, wait)
+@pytest.mark.precondition(EVERY_COFFEE_IN_CART)
+@pytest.mark.expensive_setup
+def test_removing_single_item_removes_entire_entry(driver: WebDriver, base_url: str):
+    seed_every_coffee_in_cart(driver, base_url)
 
     cart_entries: list[WebElement] = get_ordered_items_entries(driver)
     expected_size = len(cart_entries)
@@ -267,30 +330,26 @@ def test_removing_single_item_removes_entire_entry(driver: WebDriver, wait: WebD
 
         entry: WebElement = cart_entries[0]
 
-        remove_button: WebElement = get_remove_button(entry)
-
-        remove_button.click()
+        decrease_entry(entry)
         expected_size -= 1
         cart_entries = get_ordered_items_entries(driver)
 
 
-def test_total_price_of_cart_is_valid(driver: WebDriver, wait: WebDriverWait):
+@pytest.mark.expensive_setup
+def test_total_price_of_cart_is_valid(driver: WebDriver, base_url: str, price_catalogue: PriceCatalogue):
     repeats = 3
-    expected_total_cart_price = Decimal(0)
 
-    add_every_coffee_to_cart(driver, wait)
+    seed_every_coffee_in_cart(driver, base_url)
 
     cart_entries: list[WebElement] = get_ordered_items_entries(driver)
 
     for entry in cart_entries:
-        add_button: WebElement = get_add_button(entry)
-
         for _ in range(repeats):
-            add_button.click()
-
-        expected_total_cart_price += get_entry_total_price(entry)
+            increase_entry(entry)
 
-    total_price_text: str = driver.find_element(By.CSS_SELECTOR, "div.pay-container button.pay").text
-    total_price = Decimal(total_price_text[len("Total: $"):]) # Remove "Total: $" preceding text
+    cart_table: CartTable = snapshot_cart(driver)
 
-    assert total_price == expected_total_cart_price
\ No newline at end of file
+    # Every coffee was seeded once and increased three times
+    assert cart_table.items() == {name: 1 + repeats for name in COFFEE_NAMES}
+    assert cart_table.total == price_catalogue.total(cart_table.items())
+    assert cart_table.violations(price_catalogue) == []
@@ -1,19 +1,30 @@
-import re
+import asyncio
+import random
+import time
 
 import pytest
 from selenium.common import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver import ActionChains
 from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver import Firefox, ActionChains
 from selenium.webdriver.support.wait import WebDriverWait
-from decimal import Decimal
-from selenium.webdriver.support import expected_conditions as EC
 
+from support import async_driver
+from support.browser_pool import BrowserPool
+from support.bulk_actions import clear_cart, click_and_record_totals, double_click_all
+from support.cart_model import explore
+from support.menu_snapshot import MenuEntry
+from support.page_cache import open_cached_page
+from support.pages import CartPreview, MenuPage, PaymentModal, PromoDialog, open_page, reload_page
+from support.preconditions import is_prepared, precondition_of, prepare
+from support.prices import PRICE_PATTERN, PriceCatalogue, parse_total
+from support.style_probe import sample_hover_styles
+from support.timing import timed_helper
+from support.transport import uses_bidi
+from support.virtual_clock import VirtualClock
+from support.waits import DomWait
 
-URL = "https://coffee-cart.app/"
 
 VALID_ENGLISH_NAMES = [
     "Espresso",
@@ -41,112 +52,83 @@ VALID_CHINESE_NAMES = [
 
 ITEMS_TO_PROMO = 3
 
+# In cents
+DISCOUNTED_MOCHA_PRICE = 400
 
-@pytest.fixture(scope="module")
-def driver_service():
-    driver_service = Service("/snap/bin/geckodriver")
-    return driver_service
+# Upper bound of the snackbar timer, in milliseconds of the virtual clock
+SNACKBAR_TIMEOUT_BOUND = 10_000
 
-
-@pytest.fixture
-def driver(driver_service):
-    options = Options()
-    #options.add_argument("--headless")
-    driver = Firefox(options=options, service=driver_service)
-    driver.get(URL)
-
-    yield driver
-
-    driver.quit()
+# Application states shared by the read-only tests
+PROMO_SHOWN = "promo_shown"
+PAYMENT_MODAL_OPEN = "payment_modal_open"
 
 
 @pytest.fixture
-def wait(driver):
-    return WebDriverWait(driver, 5)
-
-
-def double_click(driver: WebDriver, element: WebElement):
-    scroll_script = "arguments[0].scrollIntoView({behavior: 'auto', block: 'center'});"
-    driver.execute_script(scroll_script, element)
-
-    ActionChains(driver).double_click(element).perform()
-
-
-def move_cursor_away(driver: WebDriver):
-    body: WebElement = driver.find_element(By.TAG_NAME, "body")
-
-    width = body.size["width"]
-    height = body.size["height"]
-
-    ActionChains(driver).move_to_element_with_offset(body, -width / 2, -height / 2).perform()
-
-
-def get_menu_entries(driver: WebDriver) -> list[WebElement]:
-    return driver.find_elements(By.CSS_SELECTOR, "li[data-v-a9662a08]")
-
+def driver(request: pytest.FixtureRequest, driver, base_url):
+    # A prepared state is reused as it is, loading the page would drop it
+    if is_prepared(driver):
+        return driver
 
-def get_entry_header(element: WebElement) -> WebElement:
-    return element.find_element(By.TAG_NAME, "h4")
+    # Read-only tests share the warm menu tab of the shared browser
+    if request.node.get_closest_marker("read_only") and precondition_of(request.node) is None:
+        open_cached_page(driver, base_url)
+    else:
+        open_page(driver, base_url)
 
+    return driver
 
-def get_entry_cup(element: WebElement) -> WebElement:
-    return element.find_element(By.CSS_SELECTOR, "div div.cup")
 
+@timed_helper
+def double_click_headers(driver: WebDriver, menu_headers: list[WebElement], times: int = 1) -> list[str]:
+    header_texts: list[str] = double_click_all(driver, menu_headers, times)
 
-def get_entry_price_text(element: WebElement) -> str:
-    header: WebElement = get_entry_header(element)
+    # A header is the name followed by the price
+    return [PRICE_PATTERN.sub("", header_text).strip() for header_text in header_texts]
 
-    return header.find_element(By.TAG_NAME, "small").text
 
+def get_menu_entries(driver: WebDriver) -> list[MenuEntry]:
+    return MenuPage.of(driver).entries
 
-def get_entry_price(entry_element: WebElement) -> Decimal:
-    price_text: str = get_entry_price_text(entry_element)
-    number: str = price_text[1:] # Delete $ sign
 
-    return Decimal(number)
+def get_menu_headers(driver: WebDriver) -> list[WebElement]:
+    return [entry.header for entry in get_menu_entries(driver)]
 
 
-def get_entry_name(element: WebElement) -> str:
-    header: WebElement = get_entry_header(element)
-    name_with_price: str = header.text
+def get_menu_cups(driver: WebDriver) -> list[WebElement]:
+    return [entry.cup for entry in get_menu_entries(driver)]
 
-    price_text: str = get_entry_price_text(element)
-    length_without_price: int = len(name_with_price) - len(price_text)
 
-    return name_with_price[:length_without_price].strip()
+def get_menu_entries_names(driver: WebDriver) -> list[str]:
+    return MenuPage.of(driver).names()
 
 
-def get_menu_entries_names(menu_entries: list[WebElement]) -> list[str]:
-    return list(map(get_entry_name, menu_entries))
+@timed_helper
+def order_coffee(driver: WebDriver, cup_element: WebElement):
+    MenuPage.of(driver).order(cup_element)
 
 
 def get_pay_button(driver: WebDriver) -> WebElement:
-    return driver.find_element(By.CSS_SELECTOR, "button.pay")
+    return MenuPage.of(driver).pay_button
 
 
-def assert_price_on_button_is_equal(driver: WebDriver, expected_price: Decimal):
+def assert_price_on_button_is_equal(driver: WebDriver, expected_price: int):
     pay_button: WebElement = get_pay_button(driver)
-    static_text = "Total: $"
 
-    button_value = Decimal(pay_button.text[len(static_text):])
-
-    assert button_value == expected_price
+    assert parse_total(pay_button.text) == expected_price
 
 
 def get_cart_preview(driver: WebDriver) -> WebElement:
-    return driver.find_element(By.CSS_SELECTOR, "ul.cart-preview")
+    return CartPreview.of(driver).element
 
 
 def get_cart_preview_entries(driver: WebDriver) -> list[WebElement]:
-    cart_preview: WebElement = get_cart_preview(driver)
+    return CartPreview.of(driver).entries
 
-    return cart_preview.find_elements(By.TAG_NAME, "li")
 
-
-def get_cart_preview_entry_name(wait: WebDriverWait, cart_preview_entry: WebElement) -> str:
+def get_cart_preview_entry_name(dom_wait: DomWait, cart_preview_entry: WebElement) -> str:
     span: WebElement = cart_preview_entry.find_element(By.TAG_NAME, "span")
 
-    wait.until(lambda driver: span.text != "")
+    dom_wait.until_text(span)
 
     return span.text
 
@@ -158,179 +140,244 @@ def get_cart_preview_entry_count(cart_preview_entry: WebElement) -> int:
     return int(entry_count.text[1:].strip())
 
 
+# The entry's parent is the driver which located it
 def get_add_button(cart_preview_entry: WebElement) -> WebElement:
-    return cart_preview_entry.find_element(By.CSS_SELECTOR, "div.unit-controller button")
+    return CartPreview.of(cart_preview_entry.parent).add_button(cart_preview_entry)
 
 
 def get_remove_button(cart_preview_entry: WebElement) -> WebElement:
-    return cart_preview_entry.find_elements(By.CSS_SELECTOR, "div.unit-controller button")[1]
+    return CartPreview.of(cart_preview_entry.parent).remove_button(cart_preview_entry)
+
+
+@timed_helper
+def increase_cart_preview_entry(cart_preview_entry: WebElement):
+    CartPreview.of(cart_preview_entry.parent).add(cart_preview_entry)
+
+
+@timed_helper
+def decrease_cart_preview_entry(cart_preview_entry: WebElement):
+    CartPreview.of(cart_preview_entry.parent).remove(cart_preview_entry)
 
 
 def get_promo_element(driver: WebDriver) -> WebElement:
-    return driver.find_element(By.CLASS_NAME, "promo")
+    return PromoDialog.of(driver).element
 
 
 def get_accept_promo_button(driver: WebDriver) -> WebElement:
-    promo: WebElement = get_promo_element(driver)
-
-    return promo.find_element(By.CSS_SELECTOR, "div.buttons button.yes")
+    return PromoDialog.of(driver).accept_button
 
 
 def get_discard_promo_button(driver: WebDriver) -> WebElement:
-    promo: WebElement = get_promo_element(driver)
+    return PromoDialog.of(driver).discard_button
 
-    return promo.find_elements(By.CSS_SELECTOR, "div.buttons button")[1]
 
+@timed_helper
+def accept_promo(driver: WebDriver):
+    PromoDialog.of(driver).accept()
 
-def hover_over_pay_button(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
 
-    ActionChains(driver).move_to_element(pay_button).perform()
+@timed_helper
+def discard_promo(driver: WebDriver):
+    PromoDialog.of(driver).discard()
+
+
+@timed_helper
+def hover_over_pay_button(driver: WebDriver):
+    MenuPage.of(driver).hover_over_pay_button()
 
 
 @pytest.mark.new
+@pytest.mark.read_only
 def test_menu_entries_number(driver: WebDriver):
-    menu_entries: list[WebElement] = get_menu_entries(driver)
+    menu_entries: list[MenuEntry] = get_menu_entries(driver)
 
     assert len(menu_entries) == 9
 
 
+@pytest.mark.read_only
 def test_menu_entries_are_displayed(driver: WebDriver):
-    menu_entries: list[WebElement] = get_menu_entries(driver)
+    menu_entries: list[MenuEntry] = get_menu_entries(driver)
 
     for menu_entry in menu_entries:
-        assert menu_entry.is_displayed()
+        assert menu_entry.element.is_displayed()
 
 
+@pytest.mark.read_only
 def test_menu_headers_english_names_are_valid(driver: WebDriver):
-    menu_entries: list[WebElement] = get_menu_entries(driver)
-    names: list[str] = get_menu_entries_names(menu_entries)
+    names: list[str] = get_menu_entries_names(driver)
 
     assert names == VALID_ENGLISH_NAMES
 
 
 def test_menu_headers_change_to_chinese_on_double_click(driver: WebDriver):
-    menu_entries: list[WebElement] = get_menu_entries(driver)
-    menu_headers: list[WebElement] = list(map(get_entry_header, menu_entries))
+    menu_headers: list[WebElement] = get_menu_headers(driver)
 
-    for menu_header in menu_headers:
-        double_click(driver, menu_header)
-
-    names: list[str] = get_menu_entries_names(menu_entries)
+    names: list[str] = double_click_headers(driver, menu_headers)
 
     assert names == VALID_CHINESE_NAMES
 
 
 def test_menu_headers_come_back_to_english_on_double_click(driver: WebDriver):
-    menu_entries: list[WebElement] = get_menu_entries(driver)
-    menu_headers: list[WebElement] = list(map(get_entry_header, menu_entries))
-
-    for menu_header in menu_headers:
-        double_click(driver, menu_header)
-        double_click(driver, menu_header)
+    menu_headers: list[WebElement] = get_menu_headers(driver)
 
-    names: list[str] = get_menu_entries_names(menu_entries)
+    names: list[str] = double_click_headers(driver, menu_headers, times=2)
 
     assert names == VALID_ENGLISH_NAMES
 
 
+@pytest.mark.read_only
 def test_menu_headers_change_color_on_hover(driver: WebDriver):
-    menu_headers: list[WebElement] = list(map(get_entry_header, get_menu_entries(driver)))
+    menu_headers: list[WebElement] = get_menu_headers(driver)
+
+    # Before, hover and after styles of every header are read in one call
+    for sample in sample_hover_styles(driver, menu_headers, ["color"]):
+        assert sample.before["color"] == "rgb(0, 0, 0)"
+        assert sample.hover["color"] == "rgb(218, 165, 32)"
+        assert sample.after["color"] == "rgb(0, 0, 0)"
+
+
+async def test_concurrent_browsers_show_the_same_menu(browser_pool: BrowserPool, base_url: str):
+    async with async_driver.lease_async_drivers(browser_pool, count=2, max_concurrency=2) as drivers:
+        await asyncio.gather(*(driver.get(base_url) for driver in drivers))
+        names: list[list[str]] = await asyncio.gather(*(async_driver.get_menu_entries_names(driver) for driver in drivers))
+
+    for browser_names in names:
+        assert browser_names == VALID_ENGLISH_NAMES
+
+
+async def test_concurrent_orders_stay_in_their_own_browser(browser_pool: BrowserPool, base_url: str, price_catalogue: PriceCatalogue):
+    async with async_driver.lease_async_drivers(browser_pool, count=2, max_concurrency=2) as drivers:
+        await asyncio.gather(*(driver.get(base_url) for driver in drivers))
+        menus: list[list[MenuEntry]] = await asyncio.gather(*(async_driver.get_menu_entries(driver) for driver in drivers))
+
+        # Every browser orders another coffee, its cart preview only shows that one
+        await asyncio.gather(*(
+            async_driver.order_coffee(driver, menu[index].cup) for index, (driver, menu) in enumerate(zip(drivers, menus))
+        ))
+
+        for index, (driver, menu) in enumerate(zip(drivers, menus)):
+            await driver.wait_until("present", "ul.cart-preview li")
+
+            assert len(await async_driver.get_cart_preview_entries(driver)) == 1
+            assert await async_driver.get_entry_price(driver, menu[index].element) == price_catalogue[menu[index].name]
+
+
+def overlapping_command(running: list[int], peaks: list[int]):
+    # Appending to and popping from a list is atomic, so the threads of the facade can share them
+    running.append(1)
+    peaks.append(len(running))
+    time.sleep(0.05)
+    running.pop()
+
 
-    for menu_header in menu_headers:
-        color_before: str = menu_header.value_of_css_property("color")
+async def test_async_drivers_share_the_concurrency_limit(browser_pool: BrowserPool):
+    running: list[int] = []
+    peaks: list[int] = []
 
-        ActionChains(driver).move_to_element(menu_header).perform()
-        color_on_hover: str = menu_header.value_of_css_property("color")
+    async with async_driver.lease_async_drivers(browser_pool, count=2, max_concurrency=1) as drivers:
+        await asyncio.gather(*(driver.run(overlapping_command, running, peaks) for driver in drivers for _ in range(3)))
 
-        move_cursor_away(driver)
-        color_on_mouse_off: str = menu_header.value_of_css_property("color")
+    assert max(peaks) == 1
 
-        assert color_before == "rgb(0, 0, 0)"
-        assert color_on_hover == "rgb(218, 165, 32)"
-        assert color_on_mouse_off == "rgb(0, 0, 0)"
 
+async def test_async_driver_sends_one_command_at_a_time(browser_pool: BrowserPool):
+    running: list[int] = []
+    peaks: list[int] = []
 
+    # The limit allows every command at once, only the lock of the session keeps them apart
+    async with async_driver.lease_async_drivers(browser_pool, count=1, max_concurrency=4) as drivers:
+        await asyncio.gather(*(drivers[0].run(overlapping_command, running, peaks) for _ in range(4)))
+
+    assert max(peaks) == 1
+
+
+@pytest.mark.read_only
 def test_prices_are_valid(driver: WebDriver):
-    prices: list[str] = list(map(get_entry_price_text, get_menu_entries(driver)))
-    regex = r"^\$[0-9]+\.[0-9]{2}$"
+    prices: list[str] = [entry.price_text for entry in get_menu_entries(driver)]
 
     for price in prices:
-        assert re.fullmatch(regex, price)
+        assert PRICE_PATTERN.fullmatch(price)
 
 
-# Works only in headful mode
+@pytest.mark.read_only
+@pytest.mark.animated
 def test_cups_rotate_on_hover(driver: WebDriver):
-    cups = list(map(get_entry_cup, get_menu_entries(driver)))
+    cups: list[WebElement] = get_menu_cups(driver)
+
+    # The hover state is emulated from the stylesheet, so no real pointer and no headful rendering is needed
+    for sample in sample_hover_styles(driver, cups, ["transform"]):
+        assert sample.before["transform"] == "none"
+        assert "matrix" in sample.hover["transform"]
+        assert sample.after["transform"] == "none"
+
+
+@pytest.mark.headful
+@pytest.mark.animated
+def test_cup_rotates_under_a_real_pointer(driver: WebDriver):
+    cup: WebElement = get_menu_cups(driver)[0]
+
+    # The emulated hover reads the stylesheet, this checks what a real pointer renders
+    ActionChains(driver).move_to_element(cup).perform()
 
-    for cup in cups:
-        transform_before: str = cup.value_of_css_property("transform")
+    WebDriverWait(driver, 5).until(lambda _: "matrix" in cup.value_of_css_property("transform"))
 
-        ActionChains(driver).move_to_element(cup).perform()
-        transform_on_hover: str = cup.value_of_css_property("transform")
 
-        move_cursor_away(driver)
-        transform_on_mouse_off: str = cup.value_of_css_property("transform")
+@pytest.mark.headful
+def test_headful_tests_run_in_one_xdist_group(request: pytest.FixtureRequest):
+    # xdist sets loadgroup on the workers of a --dist loadgroup run
+    if not request.config.getoption("loadgroup", False):
+        pytest.skip("The headful lane is only grouped with --dist loadgroup")
 
-        assert transform_before == "none"
-        assert "matrix" in transform_on_hover
-        assert transform_on_mouse_off == "none"
+    assert request.node.nodeid.endswith("@headful")
 
 
+@pytest.mark.read_only
 def test_pay_button_is_displayed(driver: WebDriver):
     pay_button: WebElement = get_pay_button(driver)
 
     assert pay_button.is_displayed()
 
 
+@pytest.mark.read_only
 def test_price_is_zero_initially(driver: WebDriver):
-    assert_price_on_button_is_equal(driver, Decimal(0))
+    assert_price_on_button_is_equal(driver, 0)
 
 
-def test_adding_coffees_increase_price(driver: WebDriver):
-    menu_entries: list[WebElement] = get_menu_entries(driver)
-    expected_price = Decimal(0)
+def test_adding_coffees_increase_price(driver: WebDriver, price_catalogue: PriceCatalogue):
+    menu_entries: list[MenuEntry] = get_menu_entries(driver)
+    expected_price = 0
 
     for menu_entry in menu_entries:
-        cup_element: WebElement = get_entry_cup(menu_entry)
-        coffee_price: Decimal = get_entry_price(menu_entry)
+        cup_element: WebElement = menu_entry.cup
+        coffee_price: int = price_catalogue[menu_entry.name]
 
-        cup_element.click()
+        order_coffee(driver, cup_element)
         expected_price += coffee_price
 
         assert_price_on_button_is_equal(driver, expected_price)
 
 
-def test_adding_the_same_coffee_to_cart_gives_valid_price(driver: WebDriver, wait: WebDriverWait):
+def test_adding_the_same_coffee_to_cart_gives_valid_price(driver: WebDriver, price_catalogue: PriceCatalogue):
     repeats = 10
-    cups_number = 9
 
-    for cup_index in range(cups_number):
-        driver.refresh()
+    for menu_entry in get_menu_entries(driver):
+        coffee_price: int = price_catalogue[menu_entry.name]
 
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "li[data-v-a9662a08]")))
+        # All clicks and the total after each of them in one round-trip
+        totals: list[int] = click_and_record_totals(driver, menu_entry.cup, repeats)
 
-        menu_entry: WebElement = get_menu_entries(driver)[cup_index]
-        expected_price = Decimal(0)
+        assert totals == [coffee_price * amount for amount in range(1, repeats + 1)]
 
-        cup_element: WebElement = get_entry_cup(menu_entry)
-        coffee_price: Decimal = get_entry_price(menu_entry)
-
-        for _ in range(repeats):
-            cup_element.click()
-            expected_price += coffee_price
-
-            assert_price_on_button_is_equal(driver, expected_price)
+        clear_cart(driver)
 
 
 def test_cart_preview_does_not_show_up_without_hover(driver: WebDriver):
     with pytest.raises(NoSuchElementException):
         get_cart_preview(driver)
 
-    menu_entry: WebElement = get_menu_entries(driver)[0]
-    cup_element: WebElement = get_entry_cup(menu_entry)
+    cup_element: WebElement = get_menu_cups(driver)[0]
 
-    cup_element.click()
+    order_coffee(driver, cup_element)
 
     cart_preview: WebElement = get_cart_preview(driver)
 
@@ -344,11 +391,11 @@ def test_cart_preview_does_not_show_up_when_cart_is_empty(driver: WebDriver):
         get_cart_preview(driver)
 
 
-def test_ordered_elements_show_up_in_cart_preview(driver: WebDriver, wait: WebDriverWait):
-    cup_elements: list[WebElement] = list(map(get_entry_cup, get_menu_entries(driver)))
+def test_ordered_elements_show_up_in_cart_preview(driver: WebDriver, dom_wait: DomWait):
+    cup_elements: list[WebElement] = get_menu_cups(driver)
 
     for cup in cup_elements:
-        cup.click()
+        order_coffee(driver, cup)
 
     hover_over_pay_button(driver)
 
@@ -357,7 +404,7 @@ def test_ordered_elements_show_up_in_cart_preview(driver: WebDriver, wait: WebDr
     assert len(cart_preview_entries) == 9
 
     for preview_entry in cart_preview_entries:
-        name: str = get_cart_preview_entry_name(wait, preview_entry)
+        name: str = get_cart_preview_entry_name(dom_wait, preview_entry)
         count: int = get_cart_preview_entry_count(preview_entry)
 
         assert name in VALID_ENGLISH_NAMES
@@ -365,10 +412,10 @@ def test_ordered_elements_show_up_in_cart_preview(driver: WebDriver, wait: WebDr
 
 
 def test_plus_and_minus_buttons_are_displayed_in_cart_preview(driver: WebDriver):
-    cup_elements: list[WebElement] = list(map(get_entry_cup, get_menu_entries(driver)))
+    cup_elements: list[WebElement] = get_menu_cups(driver)
 
     for cup in cup_elements:
-        cup.click()
+        order_coffee(driver, cup)
 
     hover_over_pay_button(driver)
 
@@ -383,35 +430,32 @@ def test_plus_and_minus_buttons_are_displayed_in_cart_preview(driver: WebDriver)
 
 
 def test_plus_and_minus_buttons_add_and_remove_elements_from_cart(driver: WebDriver):
-    cup_elements: list[WebElement] = list(map(get_entry_cup, get_menu_entries(driver)))
+    cup_elements: list[WebElement] = get_menu_cups(driver)
 
     for cup in cup_elements:
-        cup.click()
+        order_coffee(driver, cup)
 
     hover_over_pay_button(driver)
 
     cart_preview_entries: list[WebElement] = get_cart_preview_entries(driver)
 
     for cart_preview_entry in cart_preview_entries:
-        plus_button: WebElement = get_add_button(cart_preview_entry)
-        minus_button: WebElement = get_remove_button(cart_preview_entry)
-
-        plus_button.click()
+        increase_cart_preview_entry(cart_preview_entry)
 
         count: int = get_cart_preview_entry_count(cart_preview_entry)
         assert count == 2
 
-        minus_button.click()
+        decrease_cart_preview_entry(cart_preview_entry)
 
         count = get_cart_preview_entry_count(cart_preview_entry)
         assert count == 1
 
 
 def test_removing_single_element_from_preview_delete_entry(driver: WebDriver):
-    cup_elements: list[WebElement] = list(map(get_entry_cup, get_menu_entries(driver)))
+    cup_elements: list[WebElement] = get_menu_cups(driver)
 
     for cup in cup_elements:
-        cup.click()
+        order_coffee(driver, cup)
 
     hover_over_pay_button(driver)
 
@@ -422,9 +466,7 @@ def test_removing_single_element_from_preview_delete_entry(driver: WebDriver):
         assert expected_entries == len(cart_preview_entries)
 
         first_entry: WebElement = cart_preview_entries[0]
-        delete_button: WebElement = get_remove_button(first_entry)
-
-        delete_button.click()
+        decrease_cart_preview_entry(first_entry)
         expected_entries -= 1
 
         if expected_entries == 0:
@@ -441,10 +483,10 @@ def test_promo_is_not_displayed_initially(driver: WebDriver):
 
 
 def test_ordering_three_coffees_shows_promo(driver: WebDriver):
-    menu_entries: list[WebElement] = get_menu_entries(driver)
+    cup_elements: list[WebElement] = get_menu_cups(driver)
     counter = 0
 
-    for menu_entry in menu_entries:
+    for cup_element in cup_elements:
         if counter != 0 and counter % ITEMS_TO_PROMO == 0:
             # assert does not throw
             get_promo_element(driver)
@@ -452,28 +494,25 @@ def test_ordering_three_coffees_shows_promo(driver: WebDriver):
             with pytest.raises(NoSuchElementException):
                 get_promo_element(driver)
 
-        cup_element: WebElement = get_entry_cup(menu_entry)
-        cup_element.click()
+        order_coffee(driver, cup_element)
 
         counter += 1
 
 
-def add_items_to_cart_to_show_promo(driver: WebDriver) -> Decimal:
-    menu_entry: WebElement = get_menu_entries(driver)[0]
-    cup_element: WebElement = get_entry_cup(menu_entry)
-    entry_price: Decimal = get_entry_price(menu_entry)
-
-    expected_price = Decimal(0)
+def add_items_to_cart_to_show_promo(driver: WebDriver) -> dict[str, int]:
+    menu_entry: MenuEntry = get_menu_entries(driver)[0]
 
     for _ in range(ITEMS_TO_PROMO):
-        expected_price += entry_price
-        cup_element.click()
+        order_coffee(driver, menu_entry.cup)
 
-    return expected_price
+    return {menu_entry.name: ITEMS_TO_PROMO}
 
 
+@pytest.mark.read_only
+@pytest.mark.precondition(PROMO_SHOWN)
+@pytest.mark.expensive_setup
 def test_accept_and_discard_promo_buttons_are_displayed(driver: WebDriver):
-    add_items_to_cart_to_show_promo(driver)
+    prepare(add_items_to_cart_to_show_promo, driver)
 
     accept_button: WebElement = get_accept_promo_button(driver)
     discard_button: WebElement = get_discard_promo_button(driver)
@@ -482,11 +521,11 @@ def test_accept_and_discard_promo_buttons_are_displayed(driver: WebDriver):
     assert discard_button.is_displayed()
 
 
-def test_discard_promo_button_does_not_change_anything(driver: WebDriver):
-    expected_price: Decimal = add_items_to_cart_to_show_promo(driver)
+@pytest.mark.expensive_setup
+def test_discard_promo_button_does_not_change_anything(driver: WebDriver, price_catalogue: PriceCatalogue):
+    expected_price: int = price_catalogue.total(add_items_to_cart_to_show_promo(driver))
 
-    discard_button: WebElement = get_discard_promo_button(driver)
-    discard_button.click()
+    discard_promo(driver)
 
     with pytest.raises(NoSuchElementException):
         get_promo_element(driver)
@@ -494,28 +533,27 @@ def test_discard_promo_button_does_not_change_anything(driver: WebDriver):
     assert_price_on_button_is_equal(driver, expected_price)
 
 
-def test_accept_promo_button_adds_price(driver: WebDriver):
-    discounted_price = Decimal(4)
-    expected_price: Decimal = add_items_to_cart_to_show_promo(driver)
+@pytest.mark.expensive_setup
+def test_accept_promo_button_adds_price(driver: WebDriver, price_catalogue: PriceCatalogue):
+    expected_price: int = price_catalogue.total(add_items_to_cart_to_show_promo(driver))
 
-    accept_button: WebElement = get_accept_promo_button(driver)
-    accept_button.click()
+    accept_promo(driver)
 
-    expected_price += discounted_price
+    expected_price += DISCOUNTED_MOCHA_PRICE
 
     assert_price_on_button_is_equal(driver, expected_price)
 
 
-def test_accept_promo_adds_discounted_mocha_to_preview_on_the_first_place(driver: WebDriver, wait: WebDriverWait):
+@pytest.mark.expensive_setup
+def test_accept_promo_adds_discounted_mocha_to_preview_on_the_first_place(driver: WebDriver, dom_wait: DomWait):
     add_items_to_cart_to_show_promo(driver)
 
-    accept_button: WebElement = get_accept_promo_button(driver)
-    accept_button.click()
+    accept_promo(driver)
 
     hover_over_pay_button(driver)
 
     cart_preview_first_entry: WebElement = get_cart_preview_entries(driver)[0]
-    entry_name: str = get_cart_preview_entry_name(wait, cart_preview_first_entry)
+    entry_name: str = get_cart_preview_entry_name(dom_wait, cart_preview_first_entry)
 
     assert entry_name == "(Discounted) Mocha"
 
@@ -528,25 +566,35 @@ def is_sorted(strings: list[str]) -> bool:
     return True
 
 
-def test_items_in_cart_are_sorted_alphabetically(driver: WebDriver, wait: WebDriverWait):
-    cup_elements: list[WebElement] = list(map(get_entry_cup, get_menu_entries(driver)))
+def test_items_in_cart_are_sorted_alphabetically(driver: WebDriver, dom_wait: DomWait):
+    cup_elements: list[WebElement] = get_menu_cups(driver)
 
     for cup in cup_elements:
-        cup.click()
+        order_coffee(driver, cup)
 
     hover_over_pay_button(driver)
 
-    cart_preview_entry_names: list[str] = list(map(lambda entry: get_cart_preview_entry_name(wait, entry), get_cart_preview_entries(driver)))
+    cart_preview_entry_names: list[str] = list(map(lambda entry: get_cart_preview_entry_name(dom_wait, entry), get_cart_preview_entries(driver)))
 
     assert is_sorted(cart_preview_entry_names)
 
 
+@pytest.mark.expensive_setup
+def test_cart_and_promo_follow_the_model(request: pytest.FixtureRequest, driver: WebDriver, price_catalogue: PriceCatalogue):
+    seed_option: str = request.config.getoption("model_seed")
+
+    # Every run checks the same sequence unless a random one is asked for
+    seed: int = random.randrange(2 ** 32) if seed_option == "random" else int(seed_option)
+
+    explore(driver, price_catalogue, request.config.getoption("model_steps"), seed)
+
+
 @pytest.mark.skip(reason="I think if a user gets a discounted item for ordering 3 items, the user should not be allowed to increase the number of discounted items without limit.")
+@pytest.mark.expensive_setup
 def test_discounted_items_cannot_be_added_in_cart_preview(driver: WebDriver):
     add_items_to_cart_to_show_promo(driver)
 
-    accept_promo_button: WebElement = get_accept_promo_button(driver)
-    accept_promo_button.click()
+    accept_promo(driver)
 
     hover_over_pay_button(driver)
 
@@ -556,11 +604,11 @@ def test_discounted_items_cannot_be_added_in_cart_preview(driver: WebDriver):
         get_add_button(discounted_entry)
 
 
+@pytest.mark.expensive_setup
 def test_discounted_items_can_be_removed_in_cart_preview(driver: WebDriver):
     add_items_to_cart_to_show_promo(driver)
 
-    accept_promo_button: WebElement = get_accept_promo_button(driver)
-    accept_promo_button.click()
+    accept_promo(driver)
 
     hover_over_pay_button(driver)
 
@@ -568,14 +616,14 @@ def test_discounted_items_can_be_removed_in_cart_preview(driver: WebDriver):
     initial_cart_preview_size = len(cart_preview_entries)
 
     discounted_entry: WebElement = cart_preview_entries[0]
-    remove_button: WebElement = get_remove_button(discounted_entry)
-    remove_button.click()
+    decrease_cart_preview_entry(discounted_entry)
 
     cart_preview_entries = get_cart_preview_entries(driver)
 
     assert len(cart_preview_entries) == initial_cart_preview_size - 1
 
 
+@pytest.mark.expensive_setup
 def test_promo_shows_up_every_three_basic_items_ordered_without_promo_items(driver: WebDriver):
     for _ in range(ITEMS_TO_PROMO):
         add_items_to_cart_to_show_promo(driver)
@@ -584,19 +632,21 @@ def test_promo_shows_up_every_three_basic_items_ordered_without_promo_items(driv
 
 
 @pytest.mark.skip(reason="Discounted items counts to the promo counter. Example: 3 basic items -> Get promo item -> Need to order 2 (instead of 3) another items to get another promo.")
+@pytest.mark.expensive_setup
 def test_promo_shows_up_every_three_basic_items_ordered_with_promo_items(driver: WebDriver):
     for _ in range(ITEMS_TO_PROMO):
         add_items_to_cart_to_show_promo(driver)
 
         assert get_promo_element(driver).is_displayed()
 
-        get_accept_promo_button(driver).click()
+        accept_promo(driver)
 
 @pytest.mark.skip(reason="There is no upper limit for discounted items")
+@pytest.mark.expensive_setup
 def test_number_of_discounted_items_is_limited_by_number_of_basic_items(driver: WebDriver):
     for _ in range(3):
         add_items_to_cart_to_show_promo(driver)
-        get_accept_promo_button(driver).click()
+        accept_promo(driver)
 
     # Currently in cart: 9 basic items and 3 discounted
 
@@ -606,8 +656,6 @@ def test_number_of_discounted_items_is_limited_by_number_of_basic_items(driver:
     discounted_item_entry: WebElement = cart_preview_entries[0]
     basic_item_entry: WebElement = cart_preview_entries[1]
 
-    remove_button: WebElement = get_remove_button(basic_item_entry)
-
     basic_item_count: int = get_cart_preview_entry_count(basic_item_entry)
 
     while basic_item_count > 0:
@@ -622,36 +670,37 @@ def test_number_of_discounted_items_is_limited_by_number_of_basic_items(driver:
 
         assert discounted_item_count <= maximum_of_discounted_items
 
-        remove_button.click()
+        decrease_cart_preview_entry(basic_item_entry)
         basic_item_count -= 1
 
 
 def get_modal_element(driver: WebDriver) -> WebElement:
-    return driver.find_element(By.CSS_SELECTOR, "div.modal-content")
+    return PaymentModal.of(driver).element
 
 
 def get_modal_name_input(driver: WebDriver) -> WebElement:
-    modal: WebElement = get_modal_element(driver)
-
-    return modal.find_element(By.CSS_SELECTOR, "input#name")
+    return PaymentModal.of(driver).name_input
 
 
 def get_modal_email_input(driver: WebDriver) -> WebElement:
-    modal: WebElement = get_modal_element(driver)
-
-    return modal.find_element(By.CSS_SELECTOR, "input#email")
+    return PaymentModal.of(driver).email_input
 
 
 def get_modal_promotion_checkbox(driver: WebDriver) -> WebElement:
-    modal: WebElement = get_modal_element(driver)
-
-    return modal.find_element(By.CSS_SELECTOR, "input#promotion")
+    return PaymentModal.of(driver).promotion_checkbox
 
 
 def get_submit_payment_button(driver: WebDriver) -> WebElement:
-    modal: WebElement = get_modal_element(driver)
+    return PaymentModal.of(driver).submit_button
 
-    return modal.find_element(By.CSS_SELECTOR, "button#submit-payment")
+
+def submit_payment(driver: WebDriver):
+    PaymentModal.of(driver).submit()
+
+
+@timed_helper
+def open_payment_modal(driver: WebDriver):
+    get_pay_button(driver).click()
 
 
 def test_modal_is_not_displayed_initially(driver: WebDriver):
@@ -669,84 +718,85 @@ def test_modal_shows_up_after_pay_button_click(driver: WebDriver):
     assert modal.is_displayed()
 
 
+@pytest.mark.read_only
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_name_input_is_displayed(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     name_input: WebElement = get_modal_name_input(driver)
 
     assert name_input.is_displayed()
 
 
+@pytest.mark.read_only
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_email_input_is_displayed(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     email_input: WebElement = get_modal_email_input(driver)
 
     assert email_input.is_displayed()
 
 
+@pytest.mark.read_only
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_promo_input_is_displayed(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     promo_checkbox: WebElement = get_modal_promotion_checkbox(driver)
 
     assert promo_checkbox.is_displayed()
 
 
+@pytest.mark.read_only
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_submit_input_is_displayed(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     submit_button: WebElement = get_submit_payment_button(driver)
 
     assert submit_button.is_displayed()
 
 
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_name_and_email_cannot_be_empty(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
-    submit_button: WebElement = get_submit_payment_button(driver)
-    submit_button.click()
+    submit_payment(driver)
 
     # Modal does not disappear
     assert get_modal_element(driver).is_displayed()
 
 
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_email_cannot_be_empty(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     name_input: WebElement = get_modal_name_input(driver)
     name_input.send_keys("Test name")
 
-    submit_button: WebElement = get_submit_payment_button(driver)
-    submit_button.click()
+    submit_payment(driver)
 
     # Modal does not disappear
     assert get_modal_element(driver).is_displayed()
 
 
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_name_cannot_be_empty(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     email_input: WebElement = get_modal_email_input(driver)
     email_input.send_keys("test@test.com")
 
-    submit_button: WebElement = get_submit_payment_button(driver)
-    submit_button.click()
+    submit_payment(driver)
 
     # Modal does not disappear
     assert get_modal_element(driver).is_displayed()
 
 
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_email_must_be_valid(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     name_input: WebElement = get_modal_name_input(driver)
     name_input.send_keys("Test name")
@@ -754,16 +804,15 @@ def test_modal_email_must_be_valid(driver: WebDriver):
     email_input: WebElement = get_modal_email_input(driver)
     email_input.send_keys("test")
 
-    submit_button: WebElement = get_submit_payment_button(driver)
-    submit_button.click()
+    submit_payment(driver)
 
     # Modal does not disappear
     assert get_modal_element(driver).is_displayed()
 
 
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_disappears_with_valid_data(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     name_input: WebElement = get_modal_name_input(driver)
     name_input.send_keys("Test name")
@@ -771,15 +820,14 @@ def test_modal_disappears_with_valid_data(driver: WebDriver):
     email_input: WebElement = get_modal_email_input(driver)
     email_input.send_keys("test@test.com")
 
-    submit_button: WebElement = get_submit_payment_button(driver)
-    submit_button.click()
+    submit_payment(driver)
 
     assert not get_modal_element(driver).is_displayed()
 
 
+@pytest.mark.precondition(PAYMENT_MODAL_OPEN)
 def test_modal_checkbox_can_be_selected_and_unselected(driver: WebDriver):
-    pay_button: WebElement = get_pay_button(driver)
-    pay_button.click()
+    prepare(open_payment_modal, driver)
 
     checkbox_input: WebElement = get_modal_promotion_checkbox(driver)
 
@@ -801,29 +849,44 @@ def test_snackbar_is_not_displayed_initially(driver: WebDriver):
         get_snackbar_element(driver)
 
 
-def test_snackbar_shows_up_after_purchase(driver: WebDriver, wait: WebDriverWait):
+def test_snackbar_shows_up_after_purchase(driver: WebDriver, dom_wait: DomWait):
     get_pay_button(driver).click()
 
     get_modal_name_input(driver).send_keys("Test name")
     get_modal_email_input(driver).send_keys("test@test.com")
-    get_submit_payment_button(driver).click()
+    submit_payment(driver)
 
     snackbar: WebElement = get_snackbar_element(driver)
 
-    wait.until(EC.visibility_of(snackbar))
+    dom_wait.until_visible(snackbar)
 
     assert snackbar.is_displayed()
 
 
-def test_snackbar_disappears_after_time(driver: WebDriver, wait: WebDriverWait):
-    get_pay_button(driver).click()
+def test_snackbar_disappears_after_time(driver: WebDriver, dom_wait: DomWait):
+    clock = VirtualClock(driver)
 
-    get_modal_name_input(driver).send_keys("Test name")
-    get_modal_email_input(driver).send_keys("test@test.com")
-    get_submit_payment_button(driver).click()
+    # With BiDi the clock is in place before the application's scripts run, otherwise it joins the loaded page
+    if uses_bidi(driver):
+        clock.install_before_load()
+        reload_page(driver)
+    else:
+        clock.install()
 
-    snackbar: WebElement = get_snackbar_element(driver)
+    try:
+        get_pay_button(driver).click()
+
+        get_modal_name_input(driver).send_keys("Test name")
+        get_modal_email_input(driver).send_keys("test@test.com")
+        submit_payment(driver)
+
+        snackbar: WebElement = get_snackbar_element(driver)
+
+        dom_wait.until_visible(snackbar)
 
-    wait.until(EC.invisibility_of_element(snackbar))
+        clock.tick(SNACKBAR_TIMEOUT_BOUND)
 
-    assert not snackbar.is_displayed()
\ No newline at end of file
+        # A snackbar removed from the page counts as hidden
+        dom_wait.until_invisible(snackbar)
+    finally:
+        clock.remove_before_load()
\ No newline at end of file
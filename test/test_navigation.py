@@ -1,72 +1,57 @@
 import pytest
-from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver import Firefox
 
-MENU_URL = "https://coffee-cart.app/"
-CART_URL = "https://coffee-cart.app/cart"
-GITHUB_URL = "https://coffee-cart.app/github"
+from support.page_cache import open_cached_page
+from support.pages import NavigationBar
 
-URLS = [MENU_URL, CART_URL, GITHUB_URL]
+MENU_PATH = ""
+CART_PATH = "cart"
+GITHUB_PATH = "github"
 
+PATHS = [MENU_PATH, CART_PATH, GITHUB_PATH]
 
-@pytest.fixture(scope="module")
-def driver_service():
-    driver_service = Service("/snap/bin/geckodriver")
-    return driver_service
 
-
-@pytest.fixture
-def driver(driver_service):
-    options = Options()
-    options.add_argument("--headless")
-    driver = Firefox(options=options, service=driver_service)
-
-    yield driver
-
-    driver.quit()
+@pytest.fixture(params=PATHS, ids=["menu", "cart", "github"])
+def url(request, base_url: str) -> str:
+    return base_url + request.param
 
 
 def get_navigation(driver: WebDriver) -> WebElement:
-    return driver.find_element(By.CSS_SELECTOR, "#app ul[data-v-bb7b5941]")
+    return NavigationBar.of(driver).element
 
 
 def get_navigation_links(driver: WebDriver) -> list[WebElement]:
-    navigation = get_navigation(driver)
-
-    return navigation.find_elements(By.CSS_SELECTOR, "li[data-v-bb7b5941]")
+    return NavigationBar.of(driver).links
 
 
-@pytest.mark.parametrize("url", URLS)
+@pytest.mark.read_only
 def test_navigation_is_displayed(driver: WebDriver, url: str):
-    driver.get(url)
+    open_cached_page(driver, url)
     navigation = get_navigation(driver)
     assert navigation.is_displayed()
 
 
-@pytest.mark.parametrize("url", URLS)
+@pytest.mark.read_only
 def test_navigation_links_number(driver: WebDriver, url: str):
-    driver.get(url)
+    open_cached_page(driver, url)
     navigation_links = get_navigation_links(driver)
 
     assert len(navigation_links) == 3
 
 
-@pytest.mark.parametrize("url", URLS)
+@pytest.mark.read_only
 def test_navigation_links_are_displayed(driver: WebDriver, url: str):
-    driver.get(url)
+    open_cached_page(driver, url)
     navigation_links = get_navigation_links(driver)
 
     for link in navigation_links:
         assert link.is_displayed()
 
 
-@pytest.mark.parametrize("url", URLS)
+@pytest.mark.read_only
 def test_navigation_links_contain_valid_text_initially(driver: WebDriver, url: str):
-    driver.get(url)
+    open_cached_page(driver, url)
     navigation_links = get_navigation_links(driver)
 
     menu_link = navigation_links[0]
@@ -78,31 +63,31 @@ def test_navigation_links_contain_valid_text_initially(driver: WebDriver, url: s
     assert "github" == github_link.text
 
 
-@pytest.mark.parametrize("url", URLS)
-def test_navigation_links_are_valid(driver: WebDriver, url: str):
+def test_navigation_links_are_valid(driver: WebDriver, base_url: str, url: str):
     for link_index in range(3):
-        driver.get(url)
+        open_cached_page(driver, url)
+
+        NavigationBar.of(driver).follow(link_index)
 
-        navigation_links = get_navigation_links(driver)
+        assert base_url + PATHS[link_index] == driver.current_url
 
-        link = navigation_links[link_index]
-        link.click()
 
-        assert URLS[link_index] == driver.current_url
+# The link's parent is the driver which located it
+def get_link_anchor(link: WebElement) -> WebElement:
+    return NavigationBar.of(link.parent).anchor(link)
 
 
 def get_link_color(link: WebElement) -> str:
-    return link.find_element(By.TAG_NAME, "a").value_of_css_property("color")
+    return get_link_anchor(link).value_of_css_property("color")
 
 
-@pytest.mark.parametrize("url", URLS)
 def test_current_page_is_in_different_color(driver: WebDriver, url: str):
-    driver.get(url)
+    open_cached_page(driver, url)
 
     navigation_links = get_navigation_links(driver)
 
     for link in navigation_links:
-        if link.find_element(By.TAG_NAME, "a").get_attribute("href") == url:
+        if get_link_anchor(link).get_attribute("href") == url:
             assert "rgb(218, 165, 32)" == get_link_color(link)
         else:
             assert "rgb(0, 0, 0)" == get_link_color(link)
\ No newline at end of file